@@ -1,52 +1,29 @@
-import pandas as pd
-import numpy as np
-from math import radians, sin, cos, sqrt, atan2
-
-# Load the CSV files
-airports_df = pd.read_csv("dataset/airport_info.csv")
-trips_df = pd.read_csv("dataset/flights.csv")
-
-# Warn if "Distance" has already been added
-if 'DISTANCE' in trips_df.columns:
-    print('Warning: flights.csv already has a "Distance" column')
-
-# Create a dictionary of airport coordinates from airports_df
-airport_coords = {
-    row['AIRPORT_ID']: (row['LATITUDE'], row['LONGITUDE'])
-    for _, row in airports_df.iterrows()
-}
-
-# Define Haversine formula to calculate distance
-def haversine_distance(origin, destination):
-    lat1, lon1 = origin
-    lat2, lon2 = destination
-    # Convert latitude and longitude from degrees to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    radius = 6371  # Earth radius in kilometers
-    return radius * c
-
-# Calculate distances for each flight in trips_df
-distances = []
-for _, row in trips_df.iterrows():
-    origin_id = row['ORIGIN_AIRPORT_ID']
-    dest_id = row['DEST_AIRPORT_ID']
-    if origin_id in airport_coords and dest_id in airport_coords:
-        origin_coords = airport_coords[origin_id]
-        dest_coords = airport_coords[dest_id]
-        distance = haversine_distance(origin_coords, dest_coords)
-        distances.append(distance)
+import argparse
+from utils.dataset_loader import read_csv_cached
+from utils.distance_enrichment import add_distances
+
+# Adds the haversine DISTANCE (km) of every flight to flights.csv, streamed in chunks
+# flights that already have a valid distance are kept, so reruns only fill in new rows
+# and an already enriched file is not rewritten
+# argv is the command line (sys.argv if None), prog the name shown in --help
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Add flight distances to a flights CSV")
+    parser.add_argument("--input", default="dataset/flights.csv", help="flights CSV (default: dataset/flights.csv)")
+    parser.add_argument("--output", help="enriched CSV, written atomically (default: replace the input)")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="rows processed at a time")
+    args = parser.parse_args(argv)
+
+    # Load the airport coordinates
+    airports_df = read_csv_cached("dataset/airport_info.csv")
+
+    rows, computed = add_distances(args.input, airports_df, output_path=args.output, chunksize=args.chunksize)
+
+    if computed == 0 and not args.output:
+        print(f"{args.input} already has a DISTANCE for every flight it can, nothing to update.")
     else:
-        distances.append(np.nan)  # Use NaN for missing coordinates
-
-# Add distances as a new column in trips_df
-trips_df['DISTANCE'] = distances
+        print(f"Updated CSV file with DISTANCE column: {computed} of {rows} flights computed, "
+              f"saved as {args.output or args.input}.")
 
-# Save the updated DataFrame to the same CSV file
-trips_df.to_csv("dataset/flights.csv", index=False)
 
-print("Updated CSV file with DISTANCE column.")
+if __name__ == "__main__":
+    cli()
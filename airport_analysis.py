@@ -1,207 +1,564 @@
+import io
 import os
 import sys
+import argparse
+import contextlib
+import heapq
+import time
 import pandas as pd
 import datetime
-import numpy as np
-import networkx as nx
-import matplotlib.pyplot as plt
-from geopy.distance import geodesic
+from concurrent.futures import ProcessPoolExecutor
+from utils.airport_features import airport_features
+from utils.checkpoints import CheckpointStore, checkpoint_key
+from utils.temporal import MonthlySnapshots, SnapshotEvaluator
+from utils.results_store import ResultsWriter, candidate_record, write_manifest, update_manifest
+from utils.plot_renderer import PlotRenderer, percent_changes, percent_change_filename, render_percent_change
+from utils.dataset_loader import read_csv_cached, file_hash
+from utils.csr_graph import CSRGraph
+from utils.flight_aggregator import aggregate_routes
+from utils.network_stats import (
+    IncrementalNetworkStats, compute_network_stats, sample_pivots, BETWEENNESS_CI, WEIGHTED_DEGREE
+)
+from utils.profiling import timings, span, timed, run_profiled
+
+# Finished candidates of earlier runs, shared by every run (see main)
+CHECKPOINT_PATH = "output/checkpoints.jsonl"
+
+# Network stats the portfolio mode can maximize
+OBJECTIVES = {
+    "connectivity": "Connectivity/Reachability",
+    "betweenness": "Average Betweenness Centrality",
+    "clustering": "Global Clustering Coefficient",
+}
+
+# Route columns the flight graph can be weighted by. They count flights, carriers or
+# months, so the weighted degree stays a number of connections: it scores the airports in
+# get_best_flights_for_city and is reported as the Average Weighted Degree stat, while
+# connectivity, betweenness and clustering stay hop-based
+WEIGHT_COLUMNS = ["FREQUENCY", "NUM_CARRIERS", "NUM_MONTHS"]
 
 # Load data and initialize graph
-def load_airports_and_edges():
-    airports_df = pd.read_csv("dataset/airport_info.csv")
-    trips_df = pd.read_csv("dataset/flights.csv")
+# weight names a route column (see WEIGHT_COLUMNS) to build a weighted graph from the
+# streamed route table instead
+def load_airports_and_edges(weight=None):
+    airports_df = read_csv_cached("dataset/airport_info.csv")
+
+    if weight is not None:
+        if weight not in WEIGHT_COLUMNS:
+            raise ValueError(f"weight has to be one of {WEIGHT_COLUMNS}, not {weight!r}")
+        routes = aggregate_routes("dataset/flights.csv")
+        return CSRGraph.from_routes(routes, weight=weight), airports_df
+
+    trips_df = read_csv_cached("dataset/flights.csv")
     
     # Create directed graph from existing airport connections
-    edges = list(zip(trips_df['ORIGIN_AIRPORT_ID'], trips_df['DEST_AIRPORT_ID']))
-    G = nx.DiGraph()
-    G.add_edges_from(edges)
+    # (use G.to_networkx() where an nx.DiGraph is needed)
+    G = CSRGraph.from_edges(trips_df['ORIGIN_AIRPORT_ID'].to_numpy(), trips_df['DEST_AIRPORT_ID'].to_numpy())
     
     return G, airports_df
 
 
 # outputs the network stats
-def print_network_stats(G, label="Network"):
-    print(f"\n{label} Stats:")
-
-    # network connectivity
-    num_reachable_pairs = sum(1 for node in G for _ in nx.single_source_shortest_path_length(G, node))
-    total_possible_pairs = len(G) * (len(G) - 1)
-    connectivity = num_reachable_pairs / total_possible_pairs if total_possible_pairs > 0 else 0
-    print(f"Connectivity/Reachability: {connectivity:.6%}")
-    
-    # betweeness centrality
-    betweenness_centrality = nx.betweenness_centrality(G)
-    avg_betweenness = sum(betweenness_centrality.values()) / len(betweenness_centrality)
-    print(f"Average Betweenness Centrality: {avg_betweenness:.6f}")
-
-    # clusteirng coefficient
-    clustering_coefficient = nx.average_clustering(G.to_undirected())
-    print(f"Global Clustering Coefficient: {clustering_coefficient:.6f}")
-    
-    # return stats
-    stats = {
-        "Connectivity/Reachability": connectivity,
-        "Average Betweenness Centrality": avg_betweenness,
-        "Global Clustering Coefficient": clustering_coefficient
-    }
-
+@timed()
+def print_network_stats(G, label="Network", pivots=None):
+    stats = compute_network_stats(G, pivots)
+    print_stats(stats, label)
     return stats
 
-# This outputs a graph for each new airport into output/<time>
-def plot_percent_change(city_name, original_stats, updated_stats, base_dir):
-    # Calculate percent change in stats
-    percent_changes = {
-        key: ((updated_stats[key] - original_stats[key]) / original_stats[key]) * 100
-        for key in original_stats.keys()
-        if key not in ["Number of Nodes", "Number of Edges"]
-    }
-
-    labels = list(percent_changes.keys())
-    values = list(percent_changes.values())
-
-    x = np.arange(len(labels))
-
-    # Create graph figure
-    plt.figure(figsize=(15, 9))
-    plt.bar(x, values, color="skyblue", alpha=0.8)
-    plt.ylabel("Percent Change (%)")
-    plt.title(f"Percent Change in Network Stats for {city_name}")
-    plt.xticks(x, labels, rotation=45, ha="right")
-    plt.axhline(0, color="black", linewidth=0.8, linestyle="--")
-
-    # Add labels
-    for i, v in enumerate(values):
-        plt.text(
-            i, v + (0.1 if v > 0 else -0.1),
-            f"{v:.3f}%",
-            ha="center",
-            va="bottom" if v > 0 else "top",
-            fontsize=9
-        )
+# prints a stats dict computed by print_network_stats or the incremental evaluator
+def print_stats(stats, label="Network"):
+    print(f"\n{label} Stats:")
+    print(f"Connectivity/Reachability: {stats['Connectivity/Reachability']:.6%}")
+    if BETWEENNESS_CI in stats:
+        print(f"Average Betweenness Centrality: {stats['Average Betweenness Centrality']:.6f} "
+              f"(95% CI +/- {stats[BETWEENNESS_CI]:.6f})")
+    else:
+        print(f"Average Betweenness Centrality: {stats['Average Betweenness Centrality']:.6f}")
+    print(f"Global Clustering Coefficient: {stats['Global Clustering Coefficient']:.6f}")
+    if WEIGHTED_DEGREE in stats:
+        print(f"Average Weighted Degree: {stats[WEIGHTED_DEGREE]:.6f}")
 
-    # Save the graph
-    filename = os.path.join(base_dir, f"{city_name.replace(' ', '_')}_percent_change.png")
-    plt.tight_layout()
-    plt.savefig(filename)
-    plt.close()
+# This outputs a graph for each new airport into output/<time>
+# with a PlotRenderer the graph is queued instead of drawn here (see utils/plot_renderer.py)
+def plot_percent_change(city_name, original_stats, updated_stats, base_dir, renderer=None):
+    if renderer is None:
+        filename = percent_change_filename(base_dir, city_name)
+        render_percent_change(city_name, percent_changes(original_stats, updated_stats), filename)
+    else:
+        filename = renderer.submit(city_name, original_stats, updated_stats)
 
-    print(f"\nPercent change graph saved as {filename}")
+    if filename is not None:
+        print(f"\nPercent change graph saved as {filename}")
 
 
 # Returns the 10 'best' flights from the proposed new airports
-def get_best_flights_for_city(city_data, G, airports_df, num_flights=10):
+# features is the AirportFeatures table of G (centrality, connections and score per
+# airport), looked up from the cache tied to G if not given
+@timed()
+def get_best_flights_for_city(city_data, G, airports_df, num_flights=10, features=None):
     candidate_coord = (city_data['LATITUDE'], city_data['LONGITUDE'])
 
     if pd.isna(candidate_coord[0]) or pd.isna(candidate_coord[1]):
         return []
 
-    # focus on airports within 2,000 kilometers
-    airports_within_2000km = airports_df[
-        airports_df.apply(
-            lambda x: geodesic(candidate_coord, (x['LATITUDE'], x['LONGITUDE'])).km <= 2000
-            if pd.notna(x['LATITUDE']) and pd.notna(x['LONGITUDE']) else False,
-            axis=1
-        )
-    ]
+    if features is None:
+        features = airport_features(G, airports_df)
 
-    degree_centrality = nx.degree_centrality(G)
-
-    airports_within_2000km = airports_within_2000km.copy()
-    airports_within_2000km['centrality'] = airports_within_2000km['AIRPORT_ID'].map(degree_centrality)
-    degree_dict = dict(G.degree())
-    airports_within_2000km['num_connections'] = airports_within_2000km['AIRPORT_ID'].map(degree_dict)
-
-    airports_within_2000km['score'] = (
-        0.7 * airports_within_2000km['centrality'] +
-        0.3 * airports_within_2000km['num_connections']
-    )
-    airports_within_2000km = airports_within_2000km.sort_values(by='score', ascending=False)
-
-    airports_within_2000km = airports_within_2000km.groupby('AIRPORT_ID').agg({
-        'LATITUDE': 'mean',
-        'LONGITUDE': 'mean',
-        'score': 'max'
-    }).reset_index()
-
-    top_airports = airports_within_2000km.head(num_flights)
+    # best scored airports within 2,000 kilometers
+    top_airports = features.top_airports(candidate_coord[0], candidate_coord[1], 2000, num_flights)
 
     return top_airports[['AIRPORT_ID', 'LATITUDE', 'LONGITUDE']].to_dict('records')
 
 # adds the 10 proposed flights to a copy of the graph
 def add_city_and_flights(city_data, G, top_airports):
     candidate_airport = city_data['AIRPORT_ID']
-    G = G.copy()
-    G.add_node(candidate_airport)
-
-    for airport in top_airports:
-        airport_id = airport['AIRPORT_ID']
-        G.add_edge(candidate_airport, airport_id)
-        G.add_edge(airport_id, candidate_airport)
-    
-    return G
+    return G.with_node(candidate_airport, [airport['AIRPORT_ID'] for airport in top_airports])
 
 # takes the 10 proposed flights and gets the new stats and graph
-def process_city(city_data, G, top_airports, base_dir, original_stats):
+# when an IncrementalNetworkStats evaluator is given, the stats are updated from the
+# baseline state instead of copying the graph and recomputing everything
+# updated_stats, when given (a checkpointed result), is printed instead of recomputed
+@timed()
+def process_city(city_data, G, top_airports, base_dir, original_stats, evaluator=None, renderer=None,
+                 updated_stats=None):
     city_name = city_data['DISPLAY_AIRPORT_NAME']
 
-    updated_G = add_city_and_flights(city_data, G, top_airports)
-
     print(f"New proposed flights for {city_name}:\n")
     for flight in top_airports:
         print(flight)
     print()
 
     # print the updated stats and create the graph
-    updated_stats = print_network_stats(updated_G, "Updated Network with New Airport and Flights")
-    plot_percent_change(city_name, original_stats, updated_stats, base_dir)
+    label = "Updated Network with New Airport and Flights"
+    if updated_stats is not None:
+        print_stats(updated_stats, label)
+    elif evaluator is None:
+        updated_G = add_city_and_flights(city_data, G, top_airports)
+        updated_stats = print_network_stats(updated_G, label)
+    else:
+        with span("candidate stats"):
+            updated_stats = evaluator.candidate_stats(city_data['AIRPORT_ID'], [airport['AIRPORT_ID'] for airport in top_airports])
+        print_stats(updated_stats, label)
+    with span("plot"):
+        plot_percent_change(city_name, original_stats, updated_stats, base_dir, renderer)
+
+    return updated_stats
+
+
+# Picks the flights for one row of candidate_cities.csv and evaluates it
+# returns the proposed flights, the updated stats and the error (stats None if the city failed)
+# checkpoint is the {"flights", "stats"} result of an earlier run, replayed without recomputing
+def analyze_candidate(line, top_city, G, airports_df, base_dir, original_stats, evaluator=None, features=None,
+                      renderer=None, checkpoint=None):
+    top_flights, updated_stats, error = [], None, None
+    try:
+        print(f'\nCity {line + 1}: {top_city["DISPLAY_AIRPORT_CITY_NAME_FULL"]} -----------------------------------------------------------------------\n')
 
+        if checkpoint is None:
+            top_flights = get_best_flights_for_city(top_city, G, airports_df, num_flights=10, features=features)
+        else:
+            top_flights = checkpoint["flights"]
+        print("Top flights to add for the new airport:", top_flights)
 
-# Loops through the csv and processes each city
-def main(base_dir):
-    G, airports_df = load_airports_and_edges()
-    candidate_csv = "candidate_cities.csv"
-    candidates_df = pd.read_csv(candidate_csv)
+        updated_stats = process_city(
+            top_city, G, top_flights, base_dir, original_stats, evaluator, renderer,
+            None if checkpoint is None else checkpoint["stats"]
+        )
+    except Exception as e:
+        print(e)
+        error = str(e)
+
+    return top_flights, updated_stats, error
 
-    original_stats = print_network_stats(G, "Original Network")
+
+# Baseline state of a worker process, set once by _init_worker instead of per city
+_worker_state = {}
+
+def _init_worker(G, airports_df, base_dir, original_stats, evaluator, features, summary_only):
+    # the spans of a worker are sent back with each result (see _analyze_candidate_worker)
+    timings.reset()
+    # graphs are only collected here and handed back to the parent's renderer
+    renderer = PlotRenderer(base_dir, summary_only=summary_only, deferred=True)
+    _worker_state.update(
+        G=G, airports_df=airports_df, base_dir=base_dir,
+        original_stats=original_stats, evaluator=evaluator, features=features, renderer=renderer
+    )
+
+# Runs analyze_candidate in a worker and captures its output so the parent can
+# write it back in candidate order, along with the graphs to render and the timing spans
+def _analyze_candidate_worker(job):
+    line, top_city, checkpoint = job
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        top_flights, updated_stats, error = analyze_candidate(line, top_city, checkpoint=checkpoint, **_worker_state)
+    return buffer.getvalue(), (top_flights, updated_stats, error), _worker_state['renderer'].take_pending(), timings.take()
+
+
+# Loops through the csv and processes each city
+# with workers > 1 the cities are sent to a process pool, chunksize cities at a time
+# with betweenness_samples set, betweenness is estimated from that many source pivots,
+# drawn once with seed and shared by the baseline and every candidate
+# the percent change graphs are drawn by plot_workers background processes (0 draws them
+# in the loop), or with summary_only replaced by one summary figure and CSV/JSON
+# every candidate is also recorded in results.<results_format> (see utils/results_store.py),
+# batch_size records at a time (a Parquet part file per batch), next to a manifest.json of
+# the inputs, the parameters and the result files
+# finished candidates are checkpointed in checkpoint_path, keyed by the code version
+# (checkpoints.CHECKPOINT_VERSION), the baseline graph, the candidate row and the flight
+# selection parameters, so a rerun only computes the candidates that are new, changed or
+# unfinished (None disables checkpointing)
+@timed()
+def main(base_dir, workers=1, chunksize=1, weight=None, betweenness_samples=None, seed=0,
+         plot_workers=1, summary_only=False, results_format="jsonl", batch_size=50,
+         checkpoint_path=CHECKPOINT_PATH):
+    with span("load data"):
+        G, airports_df = load_airports_and_edges(weight=weight)
+        features = airport_features(G, airports_df)
+        candidate_csv = "candidate_cities.csv"
+        candidates_df = pd.read_csv(candidate_csv)
+
+    pivots = None if betweenness_samples is None else sample_pivots(G, betweenness_samples, seed=seed)
+    parameters = {
+        "workers": workers, "weight": weight, "betweenness_samples": betweenness_samples, "seed": seed,
+        "num_flights": 10, "radius_km": 2000,
+    }
+    inputs = {
+        "airport_info": "dataset/airport_info.csv", "flights": "dataset/flights.csv", "candidates": candidate_csv,
+    }
 
     # Process each city
-    line = 0
-    while line < len(candidates_df):
-        if len(candidates_df.iloc[line]) > 2:
-            try:
-                print(f'\nCity {line + 1}: {candidates_df.iloc[line]["DISPLAY_AIRPORT_CITY_NAME_FULL"]} -----------------------------------------------------------------------\n')
-                top_city = candidates_df.iloc[line]
+    jobs = [
+        (line, candidates_df.iloc[line])
+        for line in range(len(candidates_df))
+        if len(candidates_df.iloc[line]) > 2
+    ]
+
+    checkpoints = CheckpointStore(checkpoint_path)
+    graph_key = [G.fingerprint(), file_hash(inputs["airport_info"]), None if pivots is None else pivots.tolist()]
+    selection = {"num_flights": 10, "radius_km": 2000}
+    baseline_key = checkpoint_key("baseline", graph_key)
+    keys = [checkpoint_key("candidate", graph_key, selection, top_city) for _, top_city in jobs]
+
+    # baseline BFS distances and clustering, reused for every candidate, only built
+    # when something is not checkpointed yet
+    evaluator = None
+    with span("baseline stats"):
+        if baseline_key not in checkpoints or not all(key in checkpoints for key in keys):
+            evaluator = IncrementalNetworkStats(G, pivots=pivots)
+        if baseline_key in checkpoints:
+            original_stats = checkpoints.get(baseline_key)
+        else:
+            original_stats = evaluator.baseline_stats()
+            checkpoints.put(baseline_key, original_stats)
+    print_stats(original_stats, "Original Network")
+
+    # the manifest lists the result files as each batch is written, so an interrupted
+    # run can still be read back with results_store.read_results
+    manifest = write_manifest(base_dir, inputs, parameters, results=[], original_stats=original_stats, complete=False)
+    results = ResultsWriter(
+        os.path.join(base_dir, f"results.{results_format}"), batch_size=batch_size,
+        on_flush=lambda files: update_manifest(base_dir, manifest, results=[os.path.basename(f) for f in files])
+    )
+
+    renderer = PlotRenderer(base_dir, workers=plot_workers, summary_only=summary_only)
+    try:
+        with span("candidates"):
+            if workers > 1:
+                # flush before forking so the workers don't inherit buffered output
+                sys.stdout.flush()
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(G, airports_df, base_dir, original_stats, evaluator, features, summary_only)
+                ) as pool:
+                    # map yields in submission order, so the log matches a serial run
+                    worker_jobs = [(line, top_city, checkpoints.get(key)) for (line, top_city), key in zip(jobs, keys)]
+                    outputs = pool.map(_analyze_candidate_worker, worker_jobs, chunksize=chunksize)
+                    for (line, top_city), key, (output, result, graphs, spans) in zip(jobs, keys, outputs):
+                        sys.stdout.write(output)
+                        top_flights, updated_stats, error = result
+                        _checkpoint_candidate(checkpoints, key, top_flights, updated_stats)
+                        results.append(candidate_record(line, top_city, top_flights, original_stats, updated_stats, error))
+                        for city_name, changes in graphs:
+                            renderer.queue(city_name, changes)
+                        timings.merge(spans)
+            else:
+                for (line, top_city), key in zip(jobs, keys):
+                    top_flights, updated_stats, error = analyze_candidate(
+                        line, top_city, G, airports_df, base_dir, original_stats, evaluator, features, renderer,
+                        checkpoints.get(key)
+                    )
+                    _checkpoint_candidate(checkpoints, key, top_flights, updated_stats)
+                    results.append(candidate_record(line, top_city, top_flights, original_stats, updated_stats, error))
+    finally:
+        results.close()
+        # waits for the background renderers
+        with span("plot flush"):
+            summary_files = renderer.close()
 
-                top_flights = get_best_flights_for_city(top_city, G, airports_df, num_flights=10)
-                print("Top flights to add for the new airport:", top_flights)
+    write_manifest(base_dir, inputs, parameters, results=[os.path.basename(f) for f in results.files],
+                   original_stats=original_stats, complete=True, num_results=results.count)
 
-                process_city(top_city, G, top_flights, base_dir, original_stats)
-            except Exception as e:
-                print(e)
-        line += 1
+    for filename in summary_files:
+        print(f"\nSummary saved as {filename}")
 
     print("\nAll cities processed.")
 
 
-# Starts the script
+# Records a finished candidate, failed ones (no stats) are retried on the next run
+def _checkpoint_candidate(checkpoints, key, top_flights, updated_stats):
+    if updated_stats is not None and key not in checkpoints:
+        checkpoints.put(key, {"flights": top_flights, "stats": updated_stats})
+
+
+# Picks up to k of the candidates (line, city_data, top_flights) greedily, each time the
+# one whose airport and flights add the most to the objective stat of the network
+# with the earlier picks already added (add_city_and_flights)
+# CELF lazy evaluation: a gain computed in an earlier round is taken as an upper
+# bound, so a candidate is only re-scored when it reaches the top of the queue
+# (exact when the gains only shrink as airports are added, a heuristic otherwise)
+# stops early once time_budget seconds or max_evaluations candidate evaluations are
+# used up, or when no candidate improves the objective
+# returns the picks as (line, city_data, top_flights, gain) and the final stats
+def select_portfolio(G, candidates, k, objective="connectivity", pivots=None, time_budget=None, max_evaluations=None):
+    if k < 1:
+        raise ValueError(f"a portfolio needs at least one airport, not {k}")
+    key = OBJECTIVES[objective]
+    start = time.perf_counter()
+    evaluations = 0
+
+    def out_of_budget():
+        return ((time_budget is not None and time.perf_counter() - start > time_budget) or
+                (max_evaluations is not None and evaluations >= max_evaluations))
+
+    evaluator = IncrementalNetworkStats(G, pivots=pivots)
+    stats = evaluator.baseline_stats()
+
+    # entries are (-gain, position, round the gain was computed in)
+    queue = []
+    picks = []
+    round_number = 0
+    for position, (line, city_data, top_flights) in enumerate(candidates):
+        if out_of_budget():
+            break
+        updated = evaluator.candidate_stats(city_data['AIRPORT_ID'], [airport['AIRPORT_ID'] for airport in top_flights])
+        evaluations += 1
+        heapq.heappush(queue, (-(updated[key] - stats[key]), position, round_number))
+
+    while queue and len(picks) < k:
+        negative_gain, position, evaluated_in = heapq.heappop(queue)
+        line, city_data, top_flights = candidates[position]
+
+        if evaluated_in != round_number:
+            if out_of_budget():
+                print(f"\nStopped after {evaluations} evaluations ({time.perf_counter() - start:.1f}s), budget used up")
+                break
+            updated = evaluator.candidate_stats(city_data['AIRPORT_ID'], [airport['AIRPORT_ID'] for airport in top_flights])
+            evaluations += 1
+            heapq.heappush(queue, (-(updated[key] - stats[key]), position, round_number))
+            continue
+
+        gain = -negative_gain
+        if gain <= 0:
+            print(f"\nStopped after {len(picks)} picks, no remaining candidate improves {key}")
+            break
+
+        picks.append((line, city_data, top_flights, gain))
+        G = add_city_and_flights(city_data, G, top_flights)
+        evaluator = IncrementalNetworkStats(G, pivots=pivots)
+        stats = evaluator.baseline_stats()
+        round_number += 1
+
+        print(f"\nPick {len(picks)}: {city_data['DISPLAY_AIRPORT_NAME']} (line {line + 1}), {key} +{gain:.6g}")
+        print_stats(stats, f"Network with {len(picks)} New Airport{'s' if len(picks) > 1 else ''}")
+
+    print(f"\n{evaluations} candidate evaluations for {len(picks)} picks out of {len(candidates)} candidates")
+    return picks, stats
+
+
+# Portfolio mode: the best set of k new airports instead of each candidate alone
+@timed()
+def main_portfolio(base_dir, k, objective="connectivity", weight=None, betweenness_samples=None, seed=0,
+                   time_budget=None, max_evaluations=None):
+    G, airports_df = load_airports_and_edges(weight=weight)
+    features = airport_features(G, airports_df)
+    candidates_df = pd.read_csv("candidate_cities.csv")
+
+    pivots = None if betweenness_samples is None else sample_pivots(G, betweenness_samples, seed=seed)
+    original_stats = IncrementalNetworkStats(G, pivots=pivots).baseline_stats()
+    print_stats(original_stats, "Original Network")
+
+    # the flights of every candidate are chosen once, on the original network
+    candidates = []
+    for line in range(len(candidates_df)):
+        top_city = candidates_df.iloc[line]
+        top_flights = get_best_flights_for_city(top_city, G, airports_df, num_flights=10, features=features)
+        if top_flights:
+            candidates.append((line, top_city, top_flights))
+
+    print(f"\nSelecting up to {k} of {len(candidates)} candidate airports by {OBJECTIVES[objective]}")
+    picks, final_stats = select_portfolio(
+        G, candidates, k, objective, pivots=pivots, time_budget=time_budget, max_evaluations=max_evaluations
+    )
 
-current_time = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-base_dir = 'output/' + current_time
+    print("\nPortfolio:")
+    for i, (line, city_data, top_flights, gain) in enumerate(picks):
+        print(f"{i + 1}. {city_data['DISPLAY_AIRPORT_NAME']}: {[airport['AIRPORT_ID'] for airport in top_flights]}")
 
-# Create output directory
-os.makedirs(base_dir, exist_ok=True)
+    if picks:
+        plot_percent_change(f"Portfolio of {len(picks)} airports", original_stats, final_stats, base_dir)
 
-# File for logging output
-filename = os.path.join(base_dir, 'airport_analysis.txt')
-print('running...')
+    print("\nPortfolio selected.")
+
+
+# Temporal mode: the network and every candidate per month (or rolling window of months)
+# snapshots are stepped from one window to the next by route additions and removals, and
+# snapshot and candidate stats are checkpointed by snapshot content like in main
+# the percent changes of every candidate per window go to seasonal_changes.csv
+@timed()
+def main_temporal(base_dir, window=1, betweenness_samples=None, seed=0, checkpoint_path=CHECKPOINT_PATH):
+    G, airports_df = load_airports_and_edges()
+    features = airport_features(G, airports_df)
+    candidates_df = pd.read_csv("candidate_cities.csv")
+    routes = aggregate_routes("dataset/flights.csv")
+
+    pivots = None if betweenness_samples is None else sample_pivots(G, betweenness_samples, seed=seed)
+    evaluator = SnapshotEvaluator(CheckpointStore(checkpoint_path), pivots=pivots)
+
+    snapshots = []
+    for label, snapshot in MonthlySnapshots(routes, window=window):
+        stats = evaluator.stats(snapshot)
+        print_stats(stats, f"{label} Network")
+        print(f"Airports: {stats['Number of Nodes']}, Routes: {stats['Number of Edges']}, "
+              f"Density: {stats['Density']:.6f}")
+        snapshots.append((label, snapshot, stats))
+
+    rows = []
+    for line in range(len(candidates_df)):
+        top_city = candidates_df.iloc[line]
+        print(f'\nCity {line + 1}: {top_city["DISPLAY_AIRPORT_CITY_NAME_FULL"]} -----------------------------------------------------------------------\n')
+        try:
+            # flights are chosen once, on the network of all months
+            top_flights = get_best_flights_for_city(top_city, G, airports_df, num_flights=10, features=features)
+            airport_ids = [airport['AIRPORT_ID'] for airport in top_flights]
+            print("Top flights to add for the new airport:", airport_ids)
+
+            for label, snapshot, stats in snapshots:
+                changes = percent_changes(stats, evaluator.candidate_stats(snapshot, top_city['AIRPORT_ID'], airport_ids))
+                print(f"{label}: " + ", ".join(f"{key} {value:+.3f}%" for key, value in changes.items()))
+                rows.append({"line": line, "city": top_city['DISPLAY_AIRPORT_NAME'], "window": label, **changes})
+        except Exception as e:
+            print(e)
+
+    filename = os.path.join(base_dir, "seasonal_changes.csv")
+    pd.DataFrame(rows).to_csv(filename, index=False)
+    print(f"\nSeasonal percent changes saved as {filename}")
 
-with open(filename, 'w') as f:
-    sys.stdout = f
+    print("\nAll cities processed.")
+
+
+# argparse type of the counts that have to be at least 1
+def _positive_int(value):
     try:
-        print('Analyzing the cities from candidate_cities.csv')
-        main(base_dir)
-    finally:
-        sys.stdout = sys.__stdout__
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"has to be at least 1, not {number}")
+    return number
+
+
+# Parses the command line (argv, sys.argv if None) and runs the analysis
+# prog is the name shown in --help, e.g. "cli.py analyze" when started from cli.py
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Analyze the cities from candidate_cities.csv")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes evaluating candidate cities (default: 1, serial)")
+    parser.add_argument("--chunksize", type=int, default=1,
+                        help="candidate cities sent to a worker at a time")
+    parser.add_argument("--weight", choices=WEIGHT_COLUMNS,
+                        help="weight the routes by this column: airports are scored by their weighted degree and "
+                             "the stats gain the average weighted degree (connectivity, betweenness and "
+                             "clustering stay unweighted)")
+    parser.add_argument("--betweenness-samples", type=int,
+                        help="estimate betweenness from this many sampled source airports (default: exact)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for the betweenness pivots")
+    parser.add_argument("--plot-workers", type=int, default=1,
+                        help="background processes drawing the percent change graphs (0: draw in the analysis loop)")
+    parser.add_argument("--summary-only", action="store_true",
+                        help="write one summary figure and CSV/JSON of all percent changes instead of a graph per city")
+    parser.add_argument("--results-format", choices=["jsonl", "parquet"], default="jsonl",
+                        help="format of the per-candidate results file (default: jsonl)")
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="candidate results buffered before they are written")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH,
+                        help=f"file of finished candidates reused across runs (default: {CHECKPOINT_PATH})")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="recompute every candidate and don't record checkpoints")
+    parser.add_argument("--by-month", action="store_true",
+                        help="analyze the network and the candidates per month instead of over all months")
+    parser.add_argument("--window", type=int, default=1, choices=range(1, 13), metavar="MONTHS",
+                        help="months per snapshot with --by-month (1-12), rolling by one month (default: 1)")
+    parser.add_argument("--portfolio", type=_positive_int, metavar="K",
+                        help="select the best set of K new airports greedily instead of analyzing each city")
+    parser.add_argument("--objective", choices=list(OBJECTIVES), default="connectivity",
+                        help="network stat the portfolio maximizes (default: connectivity)")
+    parser.add_argument("--time-budget", type=float,
+                        help="stop the portfolio selection after this many seconds")
+    parser.add_argument("--max-evaluations", type=int,
+                        help="stop the portfolio selection after this many candidate evaluations")
+    parser.add_argument("--profile", action="store_true",
+                        help="also run under cProfile, writing profile.pstats and profile.txt to the output directory")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="trace allocations with tracemalloc per timing span and write memory.txt (slower)")
+    args = parser.parse_args(argv)
+
+    current_time = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    base_dir = 'output/' + current_time
+
+    # Create output directory
+    os.makedirs(base_dir, exist_ok=True)
+
+    # File for logging output
+    filename = os.path.join(base_dir, 'airport_analysis.txt')
+    print('running...')
+
+    def run():
+        if args.by_month:
+            print('Analyzing the cities from candidate_cities.csv per month')
+            main_temporal(base_dir, window=args.window, betweenness_samples=args.betweenness_samples,
+                          seed=args.seed, checkpoint_path=None if args.no_checkpoint else args.checkpoint)
+        elif args.portfolio is not None:
+            print('Selecting a portfolio of new airports from candidate_cities.csv')
+            main_portfolio(base_dir, args.portfolio, objective=args.objective, weight=args.weight,
+                           betweenness_samples=args.betweenness_samples, seed=args.seed,
+                           time_budget=args.time_budget, max_evaluations=args.max_evaluations)
+        else:
+            print('Analyzing the cities from candidate_cities.csv')
+            main(base_dir, workers=args.workers, chunksize=args.chunksize, weight=args.weight,
+                 betweenness_samples=args.betweenness_samples, seed=args.seed,
+                 plot_workers=args.plot_workers, summary_only=args.summary_only,
+                 results_format=args.results_format, batch_size=args.batch_size,
+                 checkpoint_path=None if args.no_checkpoint else args.checkpoint)
+
+    # the timing breakdown (and profiles) go next to the log, see utils/profiling.py
+    with open(filename, 'w') as f:
+        sys.stdout = f
+        try:
+            _, timing_files, profile_files = run_profiled(
+                run, base_dir, cprofile=args.profile, trace_memory=args.trace_memory
+            )
+        finally:
+            sys.stdout = sys.__stdout__
+
+    for timing_file in timing_files:
+        print(f'timings saved as {timing_file}')
+    for profile_file in profile_files:
+        print(f'profile output saved as {profile_file}')
+    print('finished.')
+
 
-print('finished.')
+# Starts the script
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,159 @@
+"""
+Load test of the candidate analysis on synthetic datasets of growing size.
+
+For every scale a synthetic dataset (see benchmarks/synthetic.py) is written to a
+temporary directory and a fresh interpreter runs the path of airport_analysis.main
+in it: load_airports_and_edges, then get_best_flights_for_city and process_city for
+every candidate, with the incremental evaluator and without drawing graphs. Reported
+per scale are the load, baseline and candidate times, the throughput in candidates
+per second and the peak memory (max RSS) of that interpreter.
+
+    python benchmarks/load_test.py --scales 0.5,1,2,5 --topology hub-and-spoke
+    python benchmarks/load_test.py --scales 1,10,20 --betweenness-samples 200 --output load.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import contextlib
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import BASE_CANDIDATES, REGIONS, TOPOLOGIES, make_dataset, write_dataset
+
+
+def run_candidates(directory, betweenness_samples=None, seed=0):
+    """
+    Runs the candidate analysis on the dataset in directory (the working directory
+    the scripts expect) and returns its measurements.
+    """
+    import pandas as pd
+    from airport_analysis import load_airports_and_edges, get_best_flights_for_city, process_city
+    from utils.airport_features import airport_features
+    from utils.network_stats import IncrementalNetworkStats, sample_pivots
+    from utils.plot_renderer import PlotRenderer
+
+    os.chdir(directory)
+    start = time.perf_counter()
+    G, airports_df = load_airports_and_edges()
+    features = airport_features(G, airports_df)
+    candidates_df = pd.read_csv("candidate_cities.csv")
+    loaded = time.perf_counter()
+
+    pivots = None if betweenness_samples is None else sample_pivots(G, betweenness_samples, seed=seed)
+    evaluator = IncrementalNetworkStats(G, pivots=pivots)
+    original_stats = evaluator.baseline_stats()
+    baseline = time.perf_counter()
+
+    # the percent changes are only collected, the graphs are not part of the load
+    renderer = PlotRenderer(directory, deferred=True)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _, city in candidates_df.iterrows():
+            top_flights = get_best_flights_for_city(city, G, airports_df, num_flights=10, features=features)
+            process_city(city, G, top_flights, directory, original_stats, evaluator, renderer)
+    done = time.perf_counter()
+
+    return {
+        "airports": len(G),
+        "routes": G.number_of_edges(),
+        "candidates": len(candidates_df),
+        "load_s": loaded - start,
+        "baseline_s": baseline - loaded,
+        "candidates_s": done - baseline,
+        "candidates_per_s": len(candidates_df) / (done - baseline) if done > baseline else float("inf"),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def peak_rss_mb():
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def load_test(scales, topology="scale-free", region="us", num_candidates=BASE_CANDIDATES,
+              betweenness_samples=None, seed=0, timeout=None):
+    """
+    Runs run_candidates in a fresh interpreter per scale, smallest first, and stops
+    after the first scale that fails or takes longer than timeout seconds.
+
+    Returns:
+        list of the measurements per scale
+
+    """
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix="airports_load_") as directory:
+            data = make_dataset(scale, seed=seed, topology=topology, region=region, num_candidates=num_candidates)
+            flights = len(data["trips_df"])
+            write_dataset(data, directory)
+            del data
+
+            command = [sys.executable, os.path.abspath(__file__), "--run-one", directory, "--seed", str(seed)]
+            if betweenness_samples is not None:
+                command += ["--betweenness-samples", str(betweenness_samples)]
+            result = {"scale": scale, "topology": topology, "region": region, "flights": flights}
+            try:
+                child = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+                if child.returncode == 0:
+                    result.update(json.loads(child.stdout.splitlines()[-1]))
+                else:
+                    result["error"] = child.stderr.strip().splitlines()[-1] if child.stderr.strip() else "failed"
+            except subprocess.TimeoutExpired:
+                result["error"] = f"timed out after {timeout}s"
+
+        results.append(result)
+        print_result(result)
+        if "error" in result:
+            break
+    return results
+
+
+def print_result(result):
+    if "error" in result:
+        print(f"{result['scale']:>6}x  {result['flights']:>10}  {result['error']}")
+        return
+    print(f"{result['scale']:>6}x  {result['flights']:>10} {result['airports']:>9} {result['routes']:>9} "
+          f"{result['load_s']:>8.2f} {result['baseline_s']:>10.2f} {result['candidates_per_s']:>10.1f} "
+          f"{result['peak_rss_mb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the candidate analysis on synthetic datasets")
+    parser.add_argument("--scales", default="0.5,1,2,5", help="comma separated dataset scales (default: 0.5,1,2,5)")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="scale-free", help="route network shape")
+    parser.add_argument("--region", choices=list(REGIONS), default="us", help="area the airports are spread over")
+    parser.add_argument("--candidates", type=int, default=BASE_CANDIDATES, help="candidate cities per dataset")
+    parser.add_argument("--betweenness-samples", type=int,
+                        help="estimate betweenness from this many sampled source airports (default: exact)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the datasets and pivots")
+    parser.add_argument("--timeout", type=float, help="seconds after which a scale is stopped")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmarks/results/load_<timestamp>.json)")
+    parser.add_argument("--run-one", metavar="DIRECTORY", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        # child interpreter of load_test, measuring one dataset
+        print(json.dumps(run_candidates(args.run_one, args.betweenness_samples, args.seed)))
+        sys.exit(0)
+
+    scales = [float(s) if "." in s else int(s) for s in args.scales.split(",")]
+    print(f"{'scale':>7}  {'flights':>10} {'airports':>9} {'routes':>9} {'load s':>8} {'baseline s':>10} "
+          f"{'cand/s':>10} {'peak MB':>9}")
+    results = load_test(scales, topology=args.topology, region=args.region, num_candidates=args.candidates,
+                        betweenness_samples=args.betweenness_samples, seed=args.seed, timeout=args.timeout)
+
+    output = args.output or os.path.join(
+        REPO_ROOT, "benchmarks", "results", datetime.datetime.now().strftime("load_%Y-%m-%d_%H-%M-%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"parameters": vars(args), "results": results}, f, indent=2)
+    print(f"\nResults saved as {output}")
@@ -0,0 +1,256 @@
+"""
+Benchmarks for the candidate-analysis pipeline on synthetic data.
+
+Each benchmark runs at 1x, 10x and 100x the size of the bundled dataset (see
+benchmarks/synthetic.py), skipping the scales above its max_scale. Timings are
+written as JSON and can be compared against a tracked baseline:
+
+    python benchmarks/run_benchmarks.py --scales 1,10 --output results.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --report benchmarks/baseline.json results.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import datetime
+import platform
+import tempfile
+import contextlib
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_dataset
+from airport_analysis import get_best_flights_for_city
+from utils.csr_graph import CSRGraph
+from utils.airport_features import AirportFeatures
+from utils.dataset_loader import read_csv_cached
+from utils.network_stats import IncrementalNetworkStats, compute_network_stats
+from utils.reachability import ReachabilityIndex
+from utils.heatmap import HeatmapPyramid
+from utils.candidate_helper_functions import rank_cities_for_new_airports
+from cli import LAZY_MODULES
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+# name -> (setup function, max scale); setup returns the callable that gets timed
+BENCHMARKS = {}
+
+
+def benchmark(name, max_scale=100):
+    def register(setup):
+        BENCHMARKS[name] = (setup, max_scale)
+        return setup
+    return register
+
+
+def _graph(data):
+    trips_df = data["trips_df"]
+    return CSRGraph.from_edges(trips_df["ORIGIN_AIRPORT_ID"].to_numpy(), trips_df["DEST_AIRPORT_ID"].to_numpy())
+
+
+@benchmark("graph.network_stats", max_scale=10)
+def setup_network_stats(data):
+    G = _graph(data)
+    return lambda: compute_network_stats(G)
+
+
+@benchmark("graph.reachable_pairs")
+def setup_reachable_pairs(data):
+    G = _graph(data)
+    return lambda: ReachabilityIndex(G).reachable_pairs()
+
+
+@benchmark("graph.candidate_stats", max_scale=10)
+def setup_candidate_stats(data):
+    G = _graph(data)
+    evaluator = IncrementalNetworkStats(G)
+    targets = [G.node_ids[np.argsort(G.degree())[-10:]].tolist()] * len(data["candidates_df"])
+    candidates = list(zip(data["candidates_df"]["AIRPORT_ID"], targets))
+    return lambda: [evaluator.candidate_stats(c, t) for c, t in candidates]
+
+
+@benchmark("flights.best_flights_for_city")
+def setup_best_flights(data):
+    G = _graph(data)
+    airports_df = data["airports_df"]
+    features = AirportFeatures(G, airports_df)
+    rows = [row for _, row in data["candidates_df"].iterrows()]
+    return lambda: [get_best_flights_for_city(row, G, airports_df, features=features) for row in rows]
+
+
+@benchmark("ranking.rank_cities_for_new_airports")
+def setup_ranking(data):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            rank_cities_for_new_airports(data["cities_df"], data["airports_df"], 0, 0)
+    return run
+
+
+@benchmark("csv.read_csv")
+def setup_read_csv(data):
+    paths = _write_csvs(data)
+    return lambda: [pd.read_csv(p) for p in paths]
+
+
+@benchmark("csv.read_csv_cached")
+def setup_read_csv_cached(data):
+    paths = _write_csvs(data)
+    for p in paths:
+        read_csv_cached(p)  # warm the cache, the timed runs are the memory-mapped reads
+    return lambda: [read_csv_cached(p) for p in paths]
+
+
+@benchmark("heatmap.pyramid")
+def setup_heatmap_pyramid(data):
+    airports_df = data["airports_df"].dropna(subset=["LATITUDE", "LONGITUDE"])
+    lats, lons = airports_df["LATITUDE"].to_numpy(), airports_df["LONGITUDE"].to_numpy()
+    weights = np.ones(len(airports_df))
+    return lambda: HeatmapPyramid.build(lats, lons, weights)
+
+
+@benchmark("startup.import_scripts", max_scale=1)
+def setup_import_scripts(data):
+    # a fresh interpreter per run, which fails if a lazily imported library got loaded
+    code = (
+        "import sys, airport_analysis, add_distances, dataset_analysis, get_candidate_cities, cli, "
+        "visualizations.airports, visualizations.population; "
+        f"loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]; "
+        "sys.exit('loaded at import time: ' + ', '.join(loaded) if loaded else 0)"
+    )
+    return lambda: subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True)
+
+
+@benchmark("startup.cli_help", max_scale=1)
+def setup_cli_help(data):
+    return lambda: subprocess.run(
+        [sys.executable, "cli.py", "--help"], cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL
+    )
+
+
+def _write_csvs(data):
+    # inside the scratch directory of the scale, removed by run() when the scale is done
+    directory = tempfile.mkdtemp(prefix="csvs_", dir=data["scratch_dir"])
+    paths = [os.path.join(directory, "airport_info.csv"), os.path.join(directory, "flights.csv")]
+    data["airports_df"].to_csv(paths[0], index=False)
+    data["trips_df"].to_csv(paths[1], index=False)
+    return paths
+
+
+def time_call(fn, repeat, budget):
+    """
+    Times fn repeat times (fewer if the first run shows they won't fit in budget seconds).
+    """
+    times = []
+    start = time.perf_counter()
+    while len(times) < repeat:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if time.perf_counter() - start > budget:
+            break
+    return {"min": min(times), "median": float(np.median(times)), "runs": len(times)}
+
+
+def run(scales, repeat, budget, selected=None):
+    results = {}
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix="airports_bench_") as scratch_dir:
+            data = make_dataset(scale)
+            data["scratch_dir"] = scratch_dir
+            for name, (setup, max_scale) in BENCHMARKS.items():
+                if scale > max_scale or (selected and not any(name.startswith(s) for s in selected)):
+                    continue
+                timing = time_call(setup(data), repeat, budget)
+                results.setdefault(name, {})[str(scale)] = timing
+                print(f"{name:<40} {scale:>4}x  min {timing['min']:.4f}s  median {timing['median']:.4f}s")
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def report(baseline, current, threshold):
+    """
+    Prints the median time ratio of current to baseline per benchmark and scale.
+
+    Returns:
+        list of (name, scale, ratio) slower than threshold
+
+    """
+    regressions = []
+    print(f"\n{'benchmark':<40} {'scale':>6} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, scales in current["results"].items():
+        for scale, timing in scales.items():
+            old = baseline["results"].get(name, {}).get(scale)
+            if old is None:
+                print(f"{name:<40} {scale + 'x':>6} {'-':>10} {timing['median']:>10.4f} {'new':>7}")
+                continue
+            ratio = timing["median"] / old["median"] if old["median"] > 0 else float("inf")
+            flag = "  REGRESSION" if ratio > threshold else ""
+            print(f"{name:<40} {scale + 'x':>6} {old['median']:>10.4f} {timing['median']:>10.4f} {ratio:>7.2f}{flag}")
+            if ratio > threshold:
+                regressions.append((name, scale, ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the candidate-analysis pipeline")
+    parser.add_argument("--scales", default="1,10,100", help="comma separated dataset scales (default: 1,10,100)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--budget", type=float, default=30.0, help="seconds after which a benchmark stops repeating")
+    parser.add_argument("--only", help="comma separated benchmark name prefixes to run")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE,
+                        help="compare the results with a baseline JSON (default: benchmarks/baseline.json)")
+    parser.add_argument("--report", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="only compare two existing result files")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="median time ratio above which a benchmark counts as a regression")
+    args = parser.parse_args()
+
+    if args.report:
+        with open(args.report[0]) as f:
+            baseline = json.load(f)
+        with open(args.report[1]) as f:
+            current = json.load(f)
+        sys.exit(1 if report(baseline, current, args.threshold) else 0)
+
+    scales = [float(s) if "." in s else int(s) for s in args.scales.split(",")]
+    selected = args.only.split(",") if args.only else None
+    current = {"meta": metadata(), "results": run(scales, args.repeat, args.budget, selected)}
+
+    output = args.output or os.path.join(
+        REPO_ROOT, "benchmarks", "results", datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults saved as {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        sys.exit(1 if report(baseline, current, args.threshold) else 0)
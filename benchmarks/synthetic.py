@@ -0,0 +1,287 @@
+"""
+Synthetic airport datasets with the schemas of dataset/airport_info.csv,
+dataset/flights.csv and candidate_cities.csv, for benchmarks and load tests.
+
+Sizes are given as a scale of the bundled dataset or as explicit counts, the route
+network as a topology (scale-free, hub-and-spoke or uniform) and the airports are
+spread over a region. Run as a script to write a dataset directory that the scripts
+can run in:
+
+    python benchmarks/synthetic.py --output /tmp/airports_10x --scale 10 --topology hub-and-spoke
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.geo_distance import paired_distance
+
+# Size of the bundled dataset, i.e. scale 1
+BASE_AIRPORTS = 6547        # distinct AIRPORT_IDs in airport_info.csv
+BASE_AIRPORT_ROWS = 18101   # rows of airport_info.csv (history rows per airport)
+BASE_SERVED = 894           # airports that appear in flights.csv
+BASE_FLIGHTS = 41931        # rows of flights.csv
+BASE_CITIES = 1000          # uscities.csv rows above the population threshold
+BASE_CANDIDATES = 30        # rows of candidate_cities.csv
+
+AIRPORT_COLUMNS = [
+    "AIRPORT_ID", "AIRPORT", "DISPLAY_AIRPORT_NAME", "DISPLAY_AIRPORT_CITY_NAME_FULL",
+    "AIRPORT_WAC", "AIRPORT_COUNTRY_NAME", "AIRPORT_COUNTRY_CODE_ISO", "AIRPORT_STATE_NAME",
+    "AIRPORT_STATE_CODE", "AIRPORT_STATE_FIPS", "CITY_MARKET_ID", "DISPLAY_CITY_MARKET_NAME_FULL",
+    "CITY_MARKET_WAC", "LAT_DEGREES", "LAT_HEMISPHERE", "LAT_MINUTES", "LAT_SECONDS",
+    "LATITUDE", "LON_DEGREES", "LON_HEMISPHERE", "LON_MINUTES", "LON_SECONDS",
+    "LONGITUDE", "AIRPORT_START_DATE", "AIRPORT_THRU_DATE", "AIRPORT_IS_CLOSED", "AIRPORT_IS_LATEST"
+]
+
+STATES = [
+    ("Alabama", "AL"), ("California", "CA"), ("Colorado", "CO"), ("Florida", "FL"), ("Georgia", "GA"),
+    ("Illinois", "IL"), ("Louisiana", "LA"), ("New York", "NY"), ("Ohio", "OH"), ("Texas", "TX"),
+    ("Utah", "UT"), ("Washington", "WA"),
+]
+
+# Bounding boxes (latitude range, longitude range) the airports are spread over
+REGIONS = {
+    "us": ((25.0, 49.0), (-124.0, -67.0)),
+    "north-america": ((15.0, 70.0), (-168.0, -52.0)),
+    "world": ((-55.0, 70.0), (-180.0, 180.0)),
+}
+
+TOPOLOGIES = ["scale-free", "hub-and-spoke", "uniform"]
+
+
+def make_airports(num_airports, num_rows, rng, region="us", first_id=10000, kind="Airport"):
+    """
+    Synthetic airport_info table: num_airports distinct AIRPORT_IDs spread over num_rows
+    history rows, with the same 27 columns as dataset/airport_info.csv, placed uniformly
+    in the bounding box of region.
+    """
+    lat_range, lon_range = REGIONS[region]
+    ids = first_id + np.arange(num_airports)
+    lats = rng.uniform(*lat_range, num_airports)
+    lons = rng.uniform(*lon_range, num_airports)
+
+    # every airport gets one row, the rest are extra history rows of random airports
+    rows = np.concatenate([np.arange(num_airports), rng.integers(0, num_airports, max(num_rows - num_airports, 0))])
+    rows.sort()
+    state = rng.integers(0, len(STATES), num_airports)[rows]
+    state_names = np.array([s[0] for s in STATES])[state]
+    state_codes = np.array([s[1] for s in STATES])[state]
+    names = np.char.add(f"{kind} ", ids[rows].astype(str))
+    cities = np.char.add(np.char.add("City ", ids[rows].astype(str)), ", ")
+    cities = np.char.add(cities, state_codes)
+    lat, lon = lats[rows], lons[rows]
+
+    return pd.DataFrame({
+        "AIRPORT_ID": ids[rows],
+        "AIRPORT": np.char.add("A", ids[rows].astype(str)),
+        "DISPLAY_AIRPORT_NAME": names,
+        "DISPLAY_AIRPORT_CITY_NAME_FULL": cities,
+        "AIRPORT_WAC": state + 1,
+        "AIRPORT_COUNTRY_NAME": "United States",
+        "AIRPORT_COUNTRY_CODE_ISO": "US",
+        "AIRPORT_STATE_NAME": state_names,
+        "AIRPORT_STATE_CODE": state_codes,
+        "AIRPORT_STATE_FIPS": (state + 1).astype(float),
+        "CITY_MARKET_ID": 30000 + ids[rows] - 10000,
+        "DISPLAY_CITY_MARKET_NAME_FULL": cities,
+        "CITY_MARKET_WAC": state + 1,
+        "LAT_DEGREES": np.floor(np.abs(lat)),
+        "LAT_HEMISPHERE": np.where(lat < 0, "S", "N"),
+        "LAT_MINUTES": np.floor(np.abs(lat) % 1 * 60),
+        "LAT_SECONDS": np.floor(np.abs(lat) * 60 % 1 * 60),
+        "LATITUDE": lat,
+        "LON_DEGREES": np.floor(np.abs(lon)),
+        "LON_HEMISPHERE": np.where(lon < 0, "W", "E"),
+        "LON_MINUTES": np.floor(np.abs(lon) % 1 * 60),
+        "LON_SECONDS": np.floor(np.abs(lon) * 60 % 1 * 60),
+        "LONGITUDE": lon,
+        "AIRPORT_START_DATE": "2007-07-01",
+        "AIRPORT_THRU_DATE": None,
+        "AIRPORT_IS_CLOSED": 0,
+        "AIRPORT_IS_LATEST": 1,
+    }, columns=AIRPORT_COLUMNS)
+
+
+def make_flights(airports_df, num_served, num_flights, rng, num_carriers=117, months=(1, 2),
+                 topology="scale-free", exponent=0.9, hub_fraction=0.03, hub_share=0.3):
+    """
+    Synthetic flights table over num_served of the airports.
+
+    topology shapes the degree distribution:
+        scale-free     Zipf-like airport popularity (popularity of rank r is 1 / r ** exponent),
+                       so a few hubs carry most routes like the real data
+        hub-and-spoke  the hub_fraction most popular airports are hubs, every other airport
+                       only flies to and from its nearest hub, and hub_share of the flights
+                       connect two hubs
+        uniform        origins and destinations drawn uniformly
+    """
+    first = airports_df.drop_duplicates(subset="AIRPORT_ID")
+    served = first.iloc[rng.choice(len(first), size=min(num_served, len(first)), replace=False)]
+    lat, lon = served["LATITUDE"].to_numpy(), served["LONGITUDE"].to_numpy()
+
+    if topology == "scale-free":
+        popularity = 1 / np.arange(1, len(served) + 1) ** exponent
+        popularity /= popularity.sum()
+        origin = rng.choice(len(served), size=num_flights, p=popularity)
+        dest = rng.choice(len(served), size=num_flights, p=popularity)
+    elif topology == "hub-and-spoke":
+        origin, dest = _hub_and_spoke(lat, lon, num_flights, rng, hub_fraction, hub_share)
+    elif topology == "uniform":
+        origin = rng.integers(0, len(served), num_flights)
+        dest = rng.integers(0, len(served), num_flights)
+    else:
+        raise ValueError(f"unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+
+    carrier = rng.integers(0, num_carriers, num_flights)
+    codes = np.char.add("C", carrier.astype(str))
+
+    distance = paired_distance(lat[origin], lon[origin], lat[dest], lon[dest])
+
+    return pd.DataFrame({
+        "UNIQUE_CARRIER": codes,
+        "UNIQUE_CARRIER_NAME": np.char.add("Carrier ", codes),
+        "ORIGIN_AIRPORT_ID": served["AIRPORT_ID"].to_numpy()[origin],
+        "ORIGIN": served["AIRPORT"].to_numpy()[origin],
+        "DEST_AIRPORT_ID": served["AIRPORT_ID"].to_numpy()[dest],
+        "DEST": served["AIRPORT"].to_numpy()[dest],
+        "MONTH": rng.choice(months, size=num_flights),
+        "DISTANCE": distance,
+    })
+
+
+def _hub_and_spoke(lat, lon, num_flights, rng, hub_fraction, hub_share):
+    # hubs are the first positions (served is already a random sample), each spoke
+    # belongs to the hub closest on the lat/lon plane
+    num_hubs = min(max(int(len(lat) * hub_fraction), 1), len(lat))
+    hubs = np.arange(num_hubs)
+    if len(lat) > num_hubs:
+        spokes = np.arange(num_hubs, len(lat))
+        nearest = np.empty(len(spokes), dtype=np.int64)
+        for start in range(0, len(spokes), 4096):
+            chunk = spokes[start:start + 4096]
+            squared = (lat[chunk, None] - lat[None, hubs]) ** 2 + (lon[chunk, None] - lon[None, hubs]) ** 2
+            nearest[start:start + 4096] = squared.argmin(axis=1)
+    else:
+        spokes = nearest = np.empty(0, dtype=np.int64)
+
+    num_hub_flights = num_flights if not len(spokes) else int(num_flights * hub_share)
+    origin = rng.integers(0, num_hubs, num_hub_flights)
+    dest = rng.integers(0, num_hubs, num_hub_flights)
+
+    # spoke flights, half of them towards the hub and half back
+    picked = rng.integers(0, len(spokes), num_flights - num_hub_flights) if len(spokes) else nearest
+    outbound = rng.random(len(picked)) < 0.5
+    spoke_ends, hub_ends = spokes[picked], nearest[picked]
+    origin = np.concatenate([origin, np.where(outbound, spoke_ends, hub_ends)])
+    dest = np.concatenate([dest, np.where(outbound, hub_ends, spoke_ends)])
+    return origin, dest
+
+
+def make_cities(num_cities, rng, region="us"):
+    """
+    Synthetic uscities table (city, state_name, population, lat, lng).
+    """
+    lat_range, lon_range = REGIONS[region]
+    state = rng.integers(0, len(STATES), num_cities)
+    return pd.DataFrame({
+        "city": np.char.add("City ", np.arange(num_cities).astype(str)),
+        "state_name": np.array([s[0] for s in STATES])[state],
+        "population": rng.lognormal(12, 1, num_cities).astype(np.int64),
+        "lat": rng.uniform(*lat_range, num_cities),
+        "lng": rng.uniform(*lon_range, num_cities),
+    })
+
+
+def make_candidates(num_candidates, rng, region="us"):
+    """
+    Synthetic candidate_cities table, one row per proposed airport with the airport_info
+    columns (like candidate_cities.csv) and IDs that no existing airport uses.
+    """
+    return make_airports(num_candidates, num_candidates, rng, region=region, first_id=20000000,
+                         kind="Candidate Municipal Airport")
+
+
+def make_dataset(scale=1, seed=0, topology="scale-free", region="us", num_candidates=BASE_CANDIDATES, **sizes):
+    """
+    Synthetic airports, flights, cities and candidates sized scale times the bundled dataset.
+
+    Parameters:
+        scale (float): size relative to the bundled dataset
+        seed (int): random seed
+        topology (str): route network shape, one of TOPOLOGIES (see make_flights)
+        region (str): area the airports, cities and candidates are spread over, a key of REGIONS
+        num_candidates (int): rows of candidate_cities.csv
+        sizes: explicit num_airports, num_airport_rows, num_served, num_flights or num_cities
+               instead of the scaled ones
+
+    Returns:
+        dict with airports_df, trips_df, cities_df and candidates_df
+
+    """
+    rng = np.random.default_rng(seed)
+    num_airports = sizes.get("num_airports", int(BASE_AIRPORTS * scale))
+    num_rows = sizes.get("num_airport_rows", max(int(BASE_AIRPORT_ROWS * scale), num_airports))
+    airports_df = make_airports(num_airports, num_rows, rng, region=region)
+    trips_df = make_flights(
+        airports_df, sizes.get("num_served", int(BASE_SERVED * scale)),
+        sizes.get("num_flights", int(BASE_FLIGHTS * scale)), rng, topology=topology
+    )
+    return {
+        "airports_df": airports_df,
+        "trips_df": trips_df,
+        "cities_df": make_cities(sizes.get("num_cities", int(BASE_CITIES * scale)), rng, region=region),
+        "candidates_df": make_candidates(num_candidates, rng, region=region),
+    }
+
+
+def write_dataset(data, directory):
+    """
+    Writes a make_dataset result in the layout the scripts read from the working
+    directory: dataset/airport_info.csv, dataset/flights.csv, dataset/uscities.csv
+    and candidate_cities.csv.
+
+    Returns:
+        dict of file name -> path
+
+    """
+    os.makedirs(os.path.join(directory, "dataset"), exist_ok=True)
+    paths = {
+        "airport_info": os.path.join(directory, "dataset", "airport_info.csv"),
+        "flights": os.path.join(directory, "dataset", "flights.csv"),
+        "cities": os.path.join(directory, "dataset", "uscities.csv"),
+        "candidates": os.path.join(directory, "candidate_cities.csv"),
+    }
+    data["airports_df"].to_csv(paths["airport_info"], index=False)
+    data["trips_df"].to_csv(paths["flights"], index=False)
+    data["cities_df"].to_csv(paths["cities"], index=False)
+    data["candidates_df"].to_csv(paths["candidates"], index=False)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic airport dataset")
+    parser.add_argument("--output", required=True, help="directory to write dataset/ and candidate_cities.csv into")
+    parser.add_argument("--scale", type=float, default=1, help="size relative to the bundled dataset (default: 1)")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="scale-free", help="route network shape")
+    parser.add_argument("--region", choices=list(REGIONS), default="us", help="area the airports are spread over")
+    parser.add_argument("--candidates", type=int, default=BASE_CANDIDATES, help="rows of candidate_cities.csv")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    for name in ("airports", "airport-rows", "served", "flights", "cities"):
+        parser.add_argument(f"--{name}", type=int, help=f"number of {name.replace('-', ' ')} instead of the scaled one")
+    args = parser.parse_args()
+
+    sizes = {
+        f"num_{name.replace('-', '_')}": getattr(args, name.replace("-", "_"))
+        for name in ("airports", "airport-rows", "served", "flights", "cities")
+        if getattr(args, name.replace("-", "_")) is not None
+    }
+    data = make_dataset(args.scale, seed=args.seed, topology=args.topology, region=args.region,
+                        num_candidates=args.candidates, **sizes)
+    for name, path in write_dataset(data, args.output).items():
+        print(f"{name}: {path}")
+
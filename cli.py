@@ -0,0 +1,52 @@
+"""
+Single entry point for the scripts of this repository, one subcommand each:
+
+    python cli.py analyze --workers 4       (airport_analysis.py)
+    python cli.py candidates                (get_candidate_cities.py)
+    python cli.py dataset                   (dataset_analysis.py)
+    python cli.py distances --chunksize N   (add_distances.py)
+    python cli.py heatmap-airports          (visualizations/airports.py)
+    python cli.py heatmap-population        (visualizations/population.py)
+
+The arguments after the subcommand go to the script, so `python cli.py analyze --help`
+lists the analysis options. A script is only imported when its subcommand runs, so
+the heavy libraries of the others (pandas, matplotlib, geopandas) are never
+loaded. The scripts at the top level still run on their own as before, the
+visualizations as modules of their package (python -m visualizations.airports).
+"""
+import sys
+import argparse
+import importlib
+
+# Libraries the scripts only import when they need them, never at import time
+# (checked by tests/test_startup.py)
+LAZY_MODULES = ["matplotlib", "networkx", "geopandas", "shapely", "sklearn", "geopy"]
+
+# subcommand -> (module with a cli(argv, prog) function, help)
+COMMANDS = {
+    "analyze": ("airport_analysis", "analyze the cities from candidate_cities.csv"),
+    "candidates": ("get_candidate_cities", "rank US cities for new airports into candidate_cities.csv"),
+    "dataset": ("dataset_analysis", "print a summary of the flight dataset"),
+    "distances": ("add_distances", "add flight distances to dataset/flights.csv"),
+    "heatmap-airports": ("visualizations.airports", "draw the airport size heatmap into output/heatmaps"),
+    "heatmap-population": ("visualizations.population", "draw the city population heatmap into output/heatmaps"),
+}
+
+
+def main(argv=None):
+    commands = "\n".join(f"  {name:<20} {help_text}" for name, (_, help_text) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Airport network analysis",
+        epilog=f"commands:\n{commands}", formatter_class=argparse.RawDescriptionHelpFormatter,
+        usage="%(prog)s [-h] command [args ...]"
+    )
+    parser.add_argument("command", choices=list(COMMANDS), metavar="command", help="script to run, see below")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments of the script")
+    args = parser.parse_args(argv)
+
+    module, _ = COMMANDS[args.command]
+    importlib.import_module(module).cli(args.args, prog=f"{parser.prog} {args.command}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,27 +1,56 @@
-import pandas as pd
-import networkx as nx
+import argparse
+from utils.csr_graph import CSRGraph
+from utils.flight_aggregator import aggregate_routes
+from utils.temporal import MonthlySnapshots, active_subgraph
+from utils.dataset_loader import read_csv_cached
 
-# Dometics airport details
-airports_df = pd.read_csv('dataset/airport_info.csv')
-print('Shape of airport_info:', airports_df.shape)
-print('Example record:', airports_df[:1].T)
 
-# Dometics airlines connections
-flights_df = pd.read_csv('dataset/flights.csv')
-print('\n=================')
-print('Shape of flights:', flights_df.shape)
-print('Example record:', flights_df[:1].T)
+# Prints the shape of the dataset and the network, route and monthly summaries
+def main():
+    # Dometics airport details
+    airports_df = read_csv_cached('dataset/airport_info.csv')
+    print('Shape of airport_info:', airports_df.shape)
+    print('Example record:', airports_df[:1].T)
 
-# convert connections to directed edges
-edges = list(zip(flights_df['ORIGIN_AIRPORT_ID'], flights_df['DEST_AIRPORT_ID']))
+    # Dometics airlines connections
+    flights_df = read_csv_cached('dataset/flights.csv')
+    print('\n=================')
+    print('Shape of flights:', flights_df.shape)
+    print('Example record:', flights_df[:1].T)
 
-# creating directed graphs based on airports and their connections
-G = nx.DiGraph()
-G.add_edges_from(edges)
+    # creating directed graphs based on airports and their connections
+    G = CSRGraph.from_edges(flights_df['ORIGIN_AIRPORT_ID'].to_numpy(), flights_df['DEST_AIRPORT_ID'].to_numpy())
 
-# printing the total number of nodes and edges of directed graph
-print('Total number of airports:', len(list(G.nodes)))
-print('Total number of connections:', len(list(G.edges)))
+    # printing the total number of nodes and edges of directed graph
+    print('Total number of airports:', G.number_of_nodes())
+    print('Total number of connections:', G.number_of_edges())
 
-# find network density
-print('Network density:', nx.density(G))
+    # find network density
+    print('Network density:', G.density())
+
+    # weighted routes, aggregated from flights.csv in one streaming pass
+    routes = aggregate_routes('dataset/flights.csv')
+    print('\n=================')
+    print('Total number of routes:', len(routes))
+    print('Average flights per route:', routes['FREQUENCY'].mean())
+    print('Average carriers per route:', routes['NUM_CARRIERS'].mean())
+    print('Average months served per route:', routes['NUM_MONTHS'].mean())
+    print('Average route distance:', routes['MEAN_DISTANCE'].mean())
+
+    # monthly networks, each stepped from the previous month by route additions and removals
+    print('\n=================')
+    for label, snapshot in MonthlySnapshots(routes):
+        active = active_subgraph(snapshot)
+        print(f'{label}: {active.number_of_nodes()} airports, {active.number_of_edges()} connections, '
+              f'density {active.density()}')
+
+
+# Command line entry point, only --help besides running it (see cli.py)
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Print a summary of the flight dataset")
+    parser.parse_args(argv)
+    main()
+
+
+if __name__ == "__main__":
+    cli()
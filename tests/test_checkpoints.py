@@ -0,0 +1,25 @@
+import pandas as pd
+
+import utils.checkpoints as checkpoints
+from utils.checkpoints import CheckpointStore, checkpoint_key
+
+
+def test_key_changes_with_code_version(monkeypatch):
+    row = pd.Series({"AIRPORT_ID": 1, "LATITUDE": 40.0})
+    key = checkpoint_key("candidate", row)
+    assert checkpoint_key("candidate", row) == key
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_VERSION", checkpoints.CHECKPOINT_VERSION + 1)
+    assert checkpoint_key("candidate", row) != key
+
+
+def test_store_survives_torn_last_line(tmp_path):
+    path = str(tmp_path / "checkpoints.jsonl")
+    store = CheckpointStore(path)
+    store.put("a", {"stats": 1})
+    with open(path, "a") as f:
+        f.write('{"key": "b", "val')
+
+    store = CheckpointStore(path)
+    assert store.get("a") == {"stats": 1} and "b" not in store
+    store.put("c", [1, 2])
+    assert CheckpointStore(path).get("c") == [1, 2]
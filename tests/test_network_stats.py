@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+nx = pytest.importorskip("networkx")
+
+from utils.csr_graph import CSRGraph
+from utils.network_stats import IncrementalNetworkStats, BETWEENNESS_CI, WEIGHTED_DEGREE
+
+STATS = ["Connectivity/Reachability", "Average Betweenness Centrality", "Global Clustering Coefficient"]
+
+# (nodes, edge probability, seed): sparse ones fall apart into several components
+GRAPHS = [(1, 0.0, 0), (2, 0.0, 1), (2, 1.0, 2), (3, 0.5, 3), (8, 0.1, 4), (12, 0.15, 5), (20, 0.3, 6), (25, 0.05, 7)]
+
+
+def random_digraph(n, p, seed):
+    # AIRPORT_IDs 10, 20, ... with a few self-loops and isolated nodes, as the flight data has
+    rng = np.random.default_rng(seed)
+    G = nx.relabel_nodes(nx.gnp_random_graph(n, p, seed=seed, directed=True), lambda i: 10 * (i + 1))
+    for node in rng.choice(list(G), size=n // 4, replace=False).tolist():
+        G.add_edge(node, node)
+    return G
+
+
+def reference_stats(G):
+    # the networkx stats print_network_stats computed before the incremental evaluator
+    num_reachable_pairs = sum(1 for node in G for _ in nx.single_source_shortest_path_length(G, node))
+    total_possible_pairs = len(G) * (len(G) - 1)
+    betweenness_centrality = nx.betweenness_centrality(G)
+    return {
+        "Connectivity/Reachability": num_reachable_pairs / total_possible_pairs if total_possible_pairs > 0 else 0,
+        "Average Betweenness Centrality": sum(betweenness_centrality.values()) / len(betweenness_centrality),
+        "Global Clustering Coefficient": nx.average_clustering(G.to_undirected()),
+    }
+
+
+def with_candidate(G, candidate, airport_ids):
+    # add_city_and_flights on an nx.DiGraph
+    G = G.copy()
+    G.add_node(candidate)
+    for airport in airport_ids:
+        G.add_edge(candidate, airport)
+        G.add_edge(airport, candidate)
+    return G
+
+
+def assert_stats_equal(stats, expected):
+    for key in STATS:
+        assert stats[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-12), key
+
+
+@pytest.mark.parametrize("n, p, seed", GRAPHS)
+def test_baseline_stats_match_networkx(n, p, seed):
+    G = random_digraph(n, p, seed)
+    assert_stats_equal(IncrementalNetworkStats(CSRGraph.from_networkx(G)).baseline_stats(), reference_stats(G))
+
+
+@pytest.mark.parametrize("n, p, seed", GRAPHS)
+def test_candidate_stats_match_networkx(n, p, seed):
+    G = random_digraph(n, p, seed)
+    evaluator = IncrementalNetworkStats(CSRGraph.from_networkx(G))
+    rng = np.random.default_rng(seed)
+
+    existing = rng.choice(list(G), size=min(n, 3), replace=False).tolist()
+    cases = [
+        (15, existing),                   # new airport between existing IDs
+        (10_000, existing + [10_001]),    # plus a target airport that is not in the graph yet
+        (10_000, [10_001, 10_002]),       # only new airports, disconnected from the graph
+        (10_000, existing[:1] * 3),       # repeated target
+    ]
+    for candidate, airport_ids in cases:
+        expected = reference_stats(with_candidate(G, candidate, airport_ids))
+        assert_stats_equal(evaluator.candidate_stats(candidate, airport_ids), expected)
+
+
+def test_candidate_stats_of_existing_airport():
+    # an airport that is already in the graph gains flights instead of being added
+    G = random_digraph(12, 0.15, 5)
+    candidate, airport_ids = 10, [30, 50, 70]
+    stats = IncrementalNetworkStats(CSRGraph.from_networkx(G)).candidate_stats(candidate, airport_ids)
+    assert_stats_equal(stats, reference_stats(with_candidate(G, candidate, airport_ids)))
+
+
+def test_all_pivots_match_exact_stats():
+    G = CSRGraph.from_networkx(random_digraph(20, 0.3, 6))
+    exact = IncrementalNetworkStats(G)
+    pivoted = IncrementalNetworkStats(G, pivots=G.node_ids)
+    assert not pivoted.sampled
+    assert_stats_equal(pivoted.baseline_stats(), exact.baseline_stats())
+    assert_stats_equal(pivoted.candidate_stats(15, [30, 50]), exact.candidate_stats(15, [30, 50]))
+
+
+def test_sampled_betweenness_has_confidence_interval():
+    G = CSRGraph.from_networkx(random_digraph(25, 0.2, 8))
+    sampled = IncrementalNetworkStats(G, pivots=G.node_ids[::3])
+    exact = IncrementalNetworkStats(G).baseline_stats()
+
+    stats = sampled.baseline_stats()
+    assert stats["Connectivity/Reachability"] == exact["Connectivity/Reachability"]
+    assert stats["Global Clustering Coefficient"] == exact["Global Clustering Coefficient"]
+    assert stats[BETWEENNESS_CI] > 0
+    assert BETWEENNESS_CI in sampled.candidate_stats(15, [30, 50])
+
+
+def test_weighted_degree_of_weighted_graph():
+    rng = np.random.default_rng(9)
+    origins, dests = rng.integers(1, 30, size=80), rng.integers(1, 30, size=80)
+    G = CSRGraph.from_edges(origins, dests, weights=rng.integers(1, 20, size=80))
+    evaluator = IncrementalNetworkStats(G)
+
+    assert evaluator.baseline_stats()[WEIGHTED_DEGREE] == pytest.approx(G.strength().mean())
+    for candidate, airport_ids in [(100, [1, 2, 3]), (100, [1, 200]), (5, [1, 2])]:
+        updated = G.with_node(candidate, airport_ids)
+        stats = evaluator.candidate_stats(candidate, airport_ids)
+        assert stats[WEIGHTED_DEGREE] == pytest.approx(updated.strength().mean())
+        # the hop-based stats don't depend on the weights
+        unweighted = CSRGraph(G.node_ids, G.indptr, G.indices)
+        assert_stats_equal(stats, IncrementalNetworkStats(unweighted).candidate_stats(candidate, airport_ids))
+
+    assert WEIGHTED_DEGREE not in IncrementalNetworkStats(CSRGraph(G.node_ids, G.indptr, G.indices)).baseline_stats()
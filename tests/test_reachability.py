@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from utils.csr_graph import CSRGraph, UNREACHABLE
+from utils.reachability import ReachabilityIndex
+
+# (nodes, edges, seed): from single nodes to graphs whose components span several bitset words
+GRAPHS = [(1, 0, 0), (2, 1, 1), (5, 0, 2), (10, 12, 3), (40, 60, 4), (70, 90, 5), (150, 160, 6), (200, 600, 7)]
+
+
+def random_digraph(n, m, seed):
+    # random edges (self-loops and repeated edges included) over AIRPORT_IDs 1..n,
+    # plus a few isolated airports without any edge
+    rng = np.random.default_rng(seed)
+    src, dst = rng.integers(0, n, size=m), rng.integers(0, n, size=m)
+    isolated = n + 1 + np.arange(3)
+    return CSRGraph.from_edges(src + 1, dst + 1, node_ids=np.concatenate([np.arange(1, n + 1), isolated]))
+
+
+def brute_force_pairs(G):
+    # a BFS from every node, each node counted as reaching itself
+    return sum(int((G.bfs_distances(s) < UNREACHABLE).sum()) for s in range(len(G)))
+
+
+@pytest.mark.parametrize("n, m, seed", GRAPHS)
+def test_reachable_pairs_match_bfs(n, m, seed):
+    G = random_digraph(n, m, seed)
+    assert ReachabilityIndex(G).reachable_pairs() == brute_force_pairs(G)
+    assert G.reachable_pairs() == brute_force_pairs(G)
+
+
+@pytest.mark.parametrize("n, m, seed", GRAPHS)
+def test_candidate_pairs_match_bfs(n, m, seed):
+    G = random_digraph(n, m, seed)
+    index = ReachabilityIndex(G)
+    rng = np.random.default_rng(seed)
+
+    for num_targets in (0, 1, min(3, len(G)), min(10, len(G))):
+        targets = rng.choice(len(G), size=num_targets, replace=False)
+        for num_new in (0, 2):
+            new_ids = [10_000 + i for i in range(num_new)]
+            updated = G.with_node(9_999, G.node_ids[targets].tolist() + new_ids)
+            assert index.candidate_pairs(targets, num_new) == brute_force_pairs(updated)
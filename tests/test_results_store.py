@@ -0,0 +1,66 @@
+import os
+import json
+
+import pandas as pd
+import pytest
+
+from utils.results_store import ResultsWriter, RESULT_COLUMNS, candidate_record, read_results, update_manifest
+
+ORIGINAL_STATS = {
+    "Connectivity/Reachability": 0.5,
+    "Average Betweenness Centrality": 0.01,
+    "Global Clustering Coefficient": 0.2,
+}
+
+
+def records(count):
+    updated = {key: value * 1.1 for key, value in ORIGINAL_STATS.items()}
+    for line in range(count):
+        city = pd.Series({
+            "DISPLAY_AIRPORT_CITY_NAME_FULL": f"City {line}", "AIRPORT_ID": 1000 + line,
+            "DISPLAY_AIRPORT_NAME": f"Airport {line}", "LATITUDE": 40.0 + line, "LONGITUDE": -100.0,
+        })
+        flights = [{"AIRPORT_ID": 10}, {"AIRPORT_ID": 20}]
+        yield candidate_record(line, city, flights, ORIGINAL_STATS, None if line == 2 else updated,
+                               "failed" if line == 2 else None)
+
+
+def start_run(base_dir, results_format, batch_size):
+    # the manifest bookkeeping of airport_analysis.main
+    manifest = update_manifest(str(base_dir), {"results": []})
+    return ResultsWriter(
+        os.path.join(base_dir, f"results.{results_format}"), batch_size=batch_size,
+        on_flush=lambda files: update_manifest(str(base_dir), manifest, results=[os.path.basename(f) for f in files])
+    )
+
+
+@pytest.mark.parametrize("results_format", ["jsonl", "parquet"])
+def test_results_round_trip(tmp_path, results_format):
+    if results_format == "parquet":
+        pytest.importorskip("pyarrow")
+    writer = start_run(tmp_path, results_format, batch_size=2)
+    for record in records(5):
+        writer.append(record)
+    writer.close()
+
+    df = read_results(str(tmp_path))
+    assert list(df.columns) == RESULT_COLUMNS
+    assert df["line"].tolist() == [0, 1, 2, 3, 4]
+    assert df["flights"].map(list).tolist() == [[10, 20]] * 5
+    assert df.loc[2, "error"] == "failed" and pd.isna(df.loc[2, "connectivity"])
+    assert df.loc[0, "connectivity_change"] == pytest.approx(10.0)
+
+
+@pytest.mark.parametrize("results_format", ["jsonl", "parquet"])
+def test_interrupted_run_keeps_finished_batches(tmp_path, results_format):
+    if results_format == "parquet":
+        pytest.importorskip("pyarrow")
+    writer = start_run(tmp_path, results_format, batch_size=2)
+    for record in records(5):
+        writer.append(record)
+    # stopped before close(): the fifth record is still buffered
+
+    with open(tmp_path / "manifest.json") as f:
+        listed = json.load(f)["results"]
+    assert len(listed) == (2 if results_format == "parquet" else 1)
+    assert read_results(str(tmp_path))["line"].tolist() == [0, 1, 2, 3]
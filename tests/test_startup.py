@@ -0,0 +1,43 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from cli import COMMANDS, LAZY_MODULES
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds a script may take to import in a fresh interpreter (pandas and numpy
+# included), far above the usual half second so a slow machine doesn't fail it
+IMPORT_TIME_LIMIT = 5.0
+
+SCRIPTS = ["cli"] + [module for module, _ in COMMANDS.values()]
+
+
+def import_in_subprocess(module):
+    # imports module in a fresh interpreter, returning its import time and the lazy libraries loaded
+    code = (
+        "import sys, json, time, importlib; "
+        "start = time.perf_counter(); "
+        f"importlib.import_module({module!r}); "
+        "seconds = time.perf_counter() - start; "
+        f"print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))"
+    )
+    child = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(child.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", SCRIPTS)
+def test_script_import_is_lazy(module):
+    result = import_in_subprocess(module)
+    assert result["loaded"] == [], f"{module} loads {', '.join(result['loaded'])} at import time"
+    assert result["seconds"] < IMPORT_TIME_LIMIT, f"{module} took {result['seconds']:.2f}s to import"
+
+
+def test_cli_import_loads_no_dependencies():
+    # the entry point itself only imports the script of the subcommand it runs
+    code = "import sys, cli; print(' '.join(m for m in ('pandas', 'numpy') if m in sys.modules))"
+    child = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert child.stdout.strip() == ""
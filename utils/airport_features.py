@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from utils.spatial_index import AirportIndex
+from utils.profiling import span
+
+# Scoring weights of get_best_flights_for_city
+CENTRALITY_WEIGHT = 0.7
+CONNECTIONS_WEIGHT = 0.3
+
+# Most recent feature table, keyed by graph fingerprint and airports table
+_cache = {}
+
+
+class AirportFeatures:
+    """
+    Per-airport feature table of a baseline graph, for scoring the flights of many
+    candidate cities without recomputing anything per candidate.
+
+    One row per AIRPORT_ID (sorted), with the airport_info history rows collapsed to
+    their mean coordinates, the degree centrality and number of connections in the
+    graph (weighted connections on a weighted graph) and the score
+    0.7 * centrality + 0.3 * num_connections. Airports that are not in the graph have
+    a NaN score. A spatial index over the rows answers the radius queries.
+
+    Parameters:
+        G (CSRGraph): baseline flight network
+        airports_df (pd.DataFrame): airport_info table with AIRPORT_ID, LATITUDE, LONGITUDE
+
+    """
+
+    def __init__(self, G, airports_df):
+        table = airports_df.groupby('AIRPORT_ID')[['LATITUDE', 'LONGITUDE']].mean()
+
+        with span("degree centrality"):
+            centrality = pd.Series(G.degree_centrality(), index=G.node_ids)
+            connections = pd.Series(G.degree() if G.weights is None else G.strength(), index=G.node_ids)
+        table['centrality'] = centrality.reindex(table.index)
+        table['num_connections'] = connections.reindex(table.index)
+        table['score'] = CENTRALITY_WEIGHT * table['centrality'] + CONNECTIONS_WEIGHT * table['num_connections']
+
+        self.table = table.reset_index()
+        self.key = feature_key(G, airports_df)
+        self.index = AirportIndex(self.table)
+
+        self._ids = self.table['AIRPORT_ID'].to_numpy()
+        # unscored airports rank below every scored one
+        self._rank_score = self.table['score'].fillna(-np.inf).to_numpy()
+
+    def top_airports(self, lat, lon, radius_km, k):
+        """
+        Finds the k best scored airports within radius_km of a point.
+
+        Parameters:
+            lat, lon (float): query point in degrees
+            radius_km (float): search radius in kilometers
+            k (int): number of airports
+
+        Returns:
+            pd.DataFrame rows of the feature table, best score first (ties by AIRPORT_ID)
+
+        """
+        if k <= 0:
+            return self.table.iloc[:0]
+
+        with span("geodesic filter"):
+            positions, _ = self.index.query_radius(lat, lon, radius_km, unit='km')
+        score = self._rank_score[positions]
+
+        chosen = np.arange(len(positions))
+        if len(positions) > k:
+            # positions are sorted by AIRPORT_ID, so the boundary ties go to the lowest IDs
+            threshold = score[np.argpartition(-score, k - 1)[:k]].min()
+            above = np.flatnonzero(score > threshold)
+            ties = np.flatnonzero(score == threshold)[:k - len(above)]
+            chosen = np.concatenate([above, ties])
+
+        chosen = chosen[np.lexsort((self._ids[positions[chosen]], -score[chosen]))]
+        return self.table.iloc[positions[chosen]]
+
+
+def feature_key(G, airports_df):
+    # The graph arrays are hashed, the airports table is taken by identity and shape
+    return (G.fingerprint(), id(airports_df), airports_df.shape)
+
+
+def airport_features(G, airports_df):
+    """
+    Returns the AirportFeatures of G and airports_df, rebuilt only when the graph
+    or the airports table changes.
+    """
+    key = feature_key(G, airports_df)
+    cached = _cache.get('features')
+    if cached is None or cached[0] is not airports_df or cached[1].key != key:
+        # holding airports_df keeps its id from being reused by another table
+        with span("feature table"):
+            _cache['features'] = (airports_df, AirportFeatures(G, airports_df))
+    return _cache['features'][1]
@@ -1,5 +1,6 @@
+import os
 import pandas as pd
-from geopy.distance import geodesic
+from utils.spatial_index import AirportIndex
 
 def determine_airport_size(airports_df, trips_df):
     """
@@ -14,15 +15,51 @@ def determine_airport_size(airports_df, trips_df):
 
     """
 
-    airports_df["num_connections"] = 0
-    for index, airport in airports_df.iterrows():
-        num_origin = len(trips_df.loc[trips_df['ORIGIN'] == airport['AIRPORT']])
-        num_dest = len(trips_df.loc[trips_df['DEST'] == airport['AIRPORT']])
-        airports_df.at[index, 'num_connections'] = num_origin + num_dest        
+    # One grouped count over the flights, joined back on the airport code
+    counts = airport_connection_counts(trips_df)['num_connections']
+    airports_df["num_connections"] = airports_df['AIRPORT'].astype(object).map(counts).fillna(0).astype(int)
 
     return airports_df
 
-def rank_cities_for_new_airports(cities_df, airports_df, population_threshold, distance_threshold):
+def airport_connection_counts(trips_df, by=None):
+    """
+    Counts the flights leaving (ORIGIN) and arriving at (DEST) each airport code in one pass.
+
+    Parameters:
+        trips_df (pd.DataFrame): flights with ORIGIN and DEST columns
+        by (str, optional): extra breakdown column, e.g. 'MONTH' or 'UNIQUE_CARRIER'
+
+    Returns:
+        pd.DataFrame indexed by AIRPORT (and by) with num_origin, num_dest and num_connections
+
+    """
+    keys = [] if by is None else [trips_df[by].astype(object)]
+    origin = trips_df.groupby([trips_df['ORIGIN'].astype(object).rename('AIRPORT')] + keys).size()
+    dest = trips_df.groupby([trips_df['DEST'].astype(object).rename('AIRPORT')] + keys).size()
+
+    counts = pd.concat([origin.rename('num_origin'), dest.rename('num_dest')], axis=1).fillna(0).astype('int64')
+    counts['num_connections'] = counts['num_origin'] + counts['num_dest']
+
+    return counts
+
+def write_airport_sizes(airports_df, path, chunksize=5000):
+    """
+    Writes airports_df (with num_connections) to the airport_sizes.csv artifact chunksize
+    rows at a time, into a temporary file that replaces path once complete.
+
+    Parameters:
+        airports_df (pd.DataFrame): output of determine_airport_size
+        path (str): destination CSV
+        chunksize (int): rows written per chunk
+
+    """
+    tmp_path = path + '.tmp'
+    airports_df.iloc[:0].to_csv(tmp_path)
+    for start in range(0, len(airports_df), chunksize):
+        airports_df.iloc[start:start + chunksize].to_csv(tmp_path, mode='a', header=False)
+    os.replace(tmp_path, path)
+
+def rank_cities_for_new_airports(cities_df, airports_df, population_threshold, distance_threshold, airport_index=None):
     """
     Ranks cities for potential new airport locations based on population and distance to the nearest airport.
 
@@ -31,38 +68,12 @@ def rank_cities_for_new_airports(cities_df, airports_df, population_threshold, d
     - airports_df (pd.DataFrame): DataFrame containing airport data with columns ['LATITUDE', 'LONGITUDE'].
     - population_threshold (int): Minimum population for cities to be considered.
     - distance_threshold (float): Minimum distance (in miles) to classify a city as underserved.
+    - airport_index (AirportIndex, optional): Spatial index over airports_df, built here if not given.
 
     Returns:
     - pd.DataFrame: Ranked cities for potential new airports with relevant columns.
     """
 
-    def find_nearest_airport(city_lat, city_lon):
-        """
-        Find the distance to the nearest airport for a given city location.
-        """
-        min_distance = float('inf')
-        
-        # Loop through each airport and calculate distance
-        for _, airport in airports_df.iterrows():
-
-            airport_lat, airport_lon = airport['LATITUDE'], airport['LONGITUDE']
-            
-            # Skip if airport coordinates are missing or invalid
-            if pd.notna(airport_lat) and pd.notna(airport_lon):
-                airport_location = (airport_lat, airport_lon)
-                city_location = (city_lat, city_lon)
-                
-                try:
-                    distance = geodesic(city_location, airport_location).miles
-                    if distance < min_distance:
-                        min_distance = distance
-                except ValueError as e:
-                    print(f"Error calculating distance for city {city_lat, city_lon} and airport {airport_lat, airport_lon}: {e}")
-                    continue
-
-        return min_distance
-
-    
     # Filter cities based on the population threshold
     filtered_cities = cities_df[cities_df['population'] >= population_threshold]
 
@@ -71,9 +82,12 @@ def rank_cities_for_new_airports(cities_df, airports_df, population_threshold, d
         return pd.DataFrame()  # Return an empty DataFrame if no cities meet the criteria
 
     # Calculate the nearest airport distance for each city
-    filtered_cities['nearest_airport_distance'] = filtered_cities.apply(
-        lambda row: find_nearest_airport(row['lat'], row['lng']), axis=1
+    if airport_index is None:
+        airport_index = AirportIndex(airports_df)
+    nearest, _ = airport_index.query_nearest(
+        filtered_cities['lat'].to_numpy(), filtered_cities['lng'].to_numpy(), k=1, unit='miles'
     )
+    filtered_cities['nearest_airport_distance'] = nearest[:, 0]
 
     # Filter cities that are underserved based on the distance threshold
     underserved_cities = filtered_cities.loc[filtered_cities['nearest_airport_distance'] >= distance_threshold]
@@ -0,0 +1,84 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+# Version of the code behind the checkpointed values, part of every key. Bump it when
+# the stats (IncrementalNetworkStats, ReachabilityIndex) or the flight selection
+# (get_best_flights_for_city, AirportFeatures) change, so reruns don't reuse stale results
+CHECKPOINT_VERSION = 2
+
+
+class CheckpointStore:
+    """
+    Persistent memo of finished work, kept across runs in a JSON Lines file.
+
+    Each line holds a key (see checkpoint_key) and a JSON value. Entries are written
+    and flushed as soon as they are put, so a run that crashes or is killed keeps
+    everything it finished, and the next run only recomputes what is missing. A torn
+    last line from a killed run is ignored. Later entries win over earlier ones.
+
+    Parameters:
+        path (str): checkpoint file, created on the first put (None keeps the
+                    entries in memory only)
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._torn = False
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                for row in f:
+                    self._torn = not row.endswith('\n')
+                    try:
+                        entry = json.loads(row)
+                    except json.JSONDecodeError:
+                        continue
+                    self.entries[entry['key']] = entry['value']
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a') as f:
+            if self._torn:
+                # start after the partial line instead of appending to it
+                f.write('\n')
+                self._torn = False
+            f.write(json.dumps({'key': key, 'value': value}, default=_json_value) + '\n')
+            f.flush()
+
+
+def checkpoint_key(*parts):
+    """
+    SHA-256 key of JSON-serializable parts (dicts, lists, numbers, strings, numpy
+    values, pandas Series) and the CHECKPOINT_VERSION, the same across runs and
+    processes of the same code version.
+    """
+    encoded = json.dumps([CHECKPOINT_VERSION, *parts], sort_keys=True, default=_json_value)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _json_value(value):
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
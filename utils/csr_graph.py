@@ -0,0 +1,313 @@
+import hashlib
+
+import numpy as np
+from scipy import sparse
+
+# Sentinel distance for unreachable pairs, large enough to never win a min()
+UNREACHABLE = np.int32(1 << 20)
+
+
+class CSRGraph:
+    """
+    Directed graph stored as compressed sparse rows over dense int32 node indices.
+
+    AIRPORT_IDs are remapped to 0..n-1 (node_ids[i] is the AIRPORT_ID of index i) and
+    the out-neighbors of node i are indices[indptr[i]:indptr[i + 1]], sorted. The
+    in-neighbors (CSC) are built on first use. Parallel edges are merged, as in an
+    nx.DiGraph, and self-loops are kept.
+
+    Parameters:
+        node_ids (np.ndarray): AIRPORT_ID of every node index
+        indptr (np.ndarray): row offsets, length n + 1
+        indices (np.ndarray): out-neighbor indices, length number of edges
+        weights (np.ndarray, optional): edge weights aligned with indices; merged
+                                        parallel edges get the sum of their weights
+
+    """
+
+    def __init__(self, node_ids, indptr, indices, weights=None):
+        self.node_ids = np.asarray(node_ids)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        self.index = {node: i for i, node in enumerate(self.node_ids.tolist())}
+        self._reverse = None
+        self._fingerprint = None
+
+    @classmethod
+    def from_edges(cls, origins, dests, node_ids=None, weights=None):
+        """
+        Builds the graph from parallel arrays of origin and destination AIRPORT_IDs.
+        node_ids optionally lists extra (possibly isolated) nodes to include and
+        weights optionally gives a weight per edge.
+        """
+        origins, dests = np.asarray(origins), np.asarray(dests)
+        all_ids = np.concatenate([origins, dests] + ([np.asarray(node_ids)] if node_ids is not None else []))
+        ids = np.unique(all_ids)
+        src = np.searchsorted(ids, origins)
+        dst = np.searchsorted(ids, dests)
+        return cls(ids, *_csr_from_coo(src, dst, len(ids), weights))
+
+    @classmethod
+    def from_routes(cls, routes, weight='FREQUENCY'):
+        """
+        Builds a weighted graph from a route table (see flight_aggregator.aggregate_routes),
+        using the given column as the edge weight.
+        """
+        return cls.from_edges(
+            routes['ORIGIN_AIRPORT_ID'].to_numpy(), routes['DEST_AIRPORT_ID'].to_numpy(),
+            weights=routes[weight].to_numpy(dtype=np.float64)
+        )
+
+    @classmethod
+    def from_networkx(cls, G):
+        ids = np.array(list(G.nodes()))
+        index = {node: i for i, node in enumerate(ids.tolist())}
+        edges = np.array([(index[u], index[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+        indptr, indices, _ = _csr_from_coo(edges[:, 0], edges[:, 1], len(ids))
+        return cls(ids, indptr, indices)
+
+    def to_networkx(self):
+        """
+        Returns the graph as an nx.DiGraph keyed by AIRPORT_ID.
+        """
+        # networkx is only needed here, not to build or analyze CSRGraphs
+        import networkx as nx
+
+        G = nx.DiGraph()
+        G.add_nodes_from(self.node_ids.tolist())
+        src, dst = self.edges()
+        edges = zip(self.node_ids[src].tolist(), self.node_ids[dst].tolist())
+        if self.weights is None:
+            G.add_edges_from(edges)
+        else:
+            G.add_weighted_edges_from((u, v, w) for (u, v), w in zip(edges, self.weights.tolist()))
+        return G
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def number_of_nodes(self):
+        return len(self.node_ids)
+
+    def number_of_edges(self):
+        return len(self.indices)
+
+    def edges(self):
+        """
+        Returns the (source, destination) index arrays of every edge.
+        """
+        src = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.indptr))
+        return src, self.indices
+
+    def fingerprint(self):
+        """
+        Content hash of the graph, for caches tied to it. The arrays are never modified
+        in place (with_node and add_edges return new graphs), so it is computed once.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for array in (self.node_ids, self.indptr, self.indices, self.weights):
+                digest.update(b"" if array is None else np.ascontiguousarray(array).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def reverse(self):
+        """
+        Returns the graph with every edge reversed (the CSC view), cached.
+        """
+        if self._reverse is None:
+            src, dst = self.edges()
+            self._reverse = CSRGraph(self.node_ids, *_csr_from_coo(dst, src, len(self), self.weights))
+            self._reverse._reverse = self
+        return self._reverse
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def in_degree(self):
+        return np.bincount(self.indices, minlength=len(self))
+
+    def degree(self):
+        """
+        In plus out degree per node index, self-loops counted twice like nx.DiGraph.degree.
+        """
+        return self.out_degree() + self.in_degree()
+
+    def strength(self):
+        """
+        In plus out edge weight per node index (the weighted degree), degree if unweighted.
+        """
+        if self.weights is None:
+            return self.degree().astype(np.float64)
+        src, dst = self.edges()
+        n = len(self)
+        return np.bincount(src, weights=self.weights, minlength=n) + np.bincount(dst, weights=self.weights, minlength=n)
+
+    def degree_centrality(self):
+        n = len(self)
+        return self.degree() / (n - 1) if n > 1 else np.ones(n)
+
+    def density(self):
+        n = len(self)
+        return self.number_of_edges() / (n * (n - 1)) if n > 1 else 0
+
+    def with_node(self, node, neighbors, weight=1.0):
+        """
+        Returns a new graph with node added and connected in both directions to every
+        AIRPORT_ID in neighbors (unknown neighbors become new nodes), like
+        add_city_and_flights on an nx.DiGraph but without copying adjacency dicts.
+        On a weighted graph the new edges get the given weight.
+        """
+        neighbors = [v for v in dict.fromkeys(neighbors) if v != node]
+        if node in self.index:
+            src = [node] * len(neighbors) + neighbors
+            dst = neighbors + [node] * len(neighbors)
+            return self.add_edges(src, dst, None if self.weights is None else [weight] * len(src))
+
+        n = len(self)
+        new_ids = [v for v in neighbors if v not in self.index]
+        c = n
+        new_index = {v: n + 1 + i for i, v in enumerate(new_ids)}
+        targets = np.sort(np.array([self.index.get(v, new_index.get(v)) for v in neighbors], dtype=np.int64))
+        old = targets[targets < n]
+
+        # c is the largest index so far, so appending it at the end of a row keeps rows sorted
+        indices = np.insert(self.indices, self.indptr[old + 1], c)
+        weights = None
+        if self.weights is not None:
+            weights = np.insert(self.weights, self.indptr[old + 1], weight)
+            weights = np.concatenate([weights, np.full(len(targets) + len(new_ids), weight)])
+        counts = np.zeros(n, dtype=np.int64)
+        counts[old] = 1
+        indptr = self.indptr.copy()
+        indptr[1:] += np.cumsum(counts)
+
+        # rows of c (all targets) and of each new neighbor (just c)
+        indices = np.concatenate([indices, targets, np.full(len(new_ids), c)])
+        tail = indptr[-1] + len(targets) + np.arange(len(new_ids) + 1)
+        indptr = np.concatenate([indptr, tail])
+
+        node_ids = np.concatenate([self.node_ids, np.array([node] + new_ids, dtype=self.node_ids.dtype)])
+        return CSRGraph(node_ids, indptr, indices, weights)
+
+    def add_edges(self, sources, destinations, weights=None):
+        """
+        Returns a new graph with the edges sources[i] -> destinations[i] (AIRPORT_IDs) added.
+        On a weighted graph weights gives their weights (1 if None).
+        """
+        src, dst = self.edges()
+        if self.weights is not None:
+            weights = np.concatenate([self.weights, np.ones(len(sources)) if weights is None else weights])
+        return CSRGraph.from_edges(
+            np.concatenate([self.node_ids[src], np.asarray(sources, dtype=self.node_ids.dtype)]),
+            np.concatenate([self.node_ids[dst], np.asarray(destinations, dtype=self.node_ids.dtype)]),
+            node_ids=self.node_ids, weights=weights if self.weights is not None else None
+        )
+
+    def apply_edge_changes(self, added_src, added_dst, removed_src=(), removed_dst=(), added_weights=None):
+        """
+        Returns a new graph over the same nodes with the edges removed_src[i] -> removed_dst[i]
+        dropped and added_src[i] -> added_dst[i] added (node indices, not AIRPORT_IDs),
+        e.g. to step from one time-slice snapshot to the next. On a weighted graph the
+        added edges get added_weights (1 if None).
+        """
+        n = len(self)
+        src, dst = self.edges()
+        removed = np.asarray(removed_src, dtype=np.int64) * n + np.asarray(removed_dst, dtype=np.int64)
+        keep = ~np.isin(src.astype(np.int64) * n + dst, removed)
+
+        added_src = np.asarray(added_src, dtype=np.int64)
+        weights = None
+        if self.weights is not None:
+            added = np.ones(len(added_src)) if added_weights is None else added_weights
+            weights = np.concatenate([self.weights[keep], added])
+        indptr, indices, weights = _csr_from_coo(
+            np.concatenate([src[keep], added_src]), np.concatenate([dst[keep], np.asarray(added_dst, dtype=np.int64)]),
+            n, weights
+        )
+        return CSRGraph(self.node_ids, indptr, indices, weights)
+
+    def subgraph(self, nodes):
+        """
+        Returns the graph induced by the node indices in nodes (sorted, re-indexed).
+        """
+        nodes = np.unique(np.asarray(nodes, dtype=np.int64))
+        position = np.full(len(self), -1, dtype=np.int64)
+        position[nodes] = np.arange(len(nodes))
+        src, dst = self.edges()
+        keep = (position[src] >= 0) & (position[dst] >= 0)
+        indptr, indices, weights = _csr_from_coo(
+            position[src[keep]], position[dst[keep]], len(nodes),
+            None if self.weights is None else self.weights[keep]
+        )
+        return CSRGraph(self.node_ids[nodes], indptr, indices, weights)
+
+    def bfs_distances(self, source):
+        """
+        Hop distance from node index source to every node index, UNREACHABLE if none.
+        """
+        distances = np.full(len(self), UNREACHABLE, dtype=np.int32)
+        distances[source] = 0
+        frontier = np.array([source], dtype=np.int64)
+        level = 0
+        while len(frontier):
+            level += 1
+            neighbors = self.indices[_ranges(self.indptr[frontier], self.indptr[frontier + 1])]
+            frontier = np.unique(neighbors[distances[neighbors] == UNREACHABLE])
+            distances[frontier] = level
+        return distances
+
+    def reachable_pairs(self):
+        """
+        Number of (source, target) pairs with a path, each node counted as reaching itself.
+        """
+        # imported here, utils.reachability builds on this module
+        from utils.reachability import ReachabilityIndex
+        return ReachabilityIndex(self).reachable_pairs()
+
+    def undirected(self):
+        """
+        Symmetric graph with the edge direction dropped and self-loops removed.
+        """
+        src, dst = self.edges()
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+        indptr, indices, _ = _csr_from_coo(np.concatenate([src, dst]), np.concatenate([dst, src]), len(self))
+        return CSRGraph(self.node_ids, indptr, indices)
+
+    def triangles(self):
+        """
+        Number of triangles through each node in the undirected graph.
+        """
+        U = self.undirected()
+        A = sparse.csr_matrix(
+            (np.ones(len(U.indices), dtype=np.int64), U.indices, U.indptr), shape=(len(U), len(U))
+        )
+        return np.asarray((A @ A).multiply(A).sum(axis=1)).ravel() // 2
+
+
+def _csr_from_coo(src, dst, n, weights=None):
+    # Sorted, de-duplicated CSR arrays (and summed weights) from parallel index arrays
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    keys, inverse = np.unique(src * n + dst, return_inverse=True)
+    rows, cols = np.divmod(keys, n) if n else (keys, keys)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=n))
+    if weights is not None:
+        weights = np.bincount(inverse.ravel(), weights=np.asarray(weights, dtype=np.float64), minlength=len(keys))
+    return indptr, cols.astype(np.int32), weights
+
+
+def _ranges(starts, stops):
+    # Concatenation of arange(start, stop) for every pair, without a Python loop
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total)
@@ -0,0 +1,142 @@
+import os
+import json
+import hashlib
+import pandas as pd
+
+from utils.profiling import timed
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # caching is skipped without pyarrow
+    feather = None
+
+CACHE_SUFFIX = '.cache.feather'
+FINGERPRINT_KEY = b'source_fingerprint'
+
+# String columns with at most this share of distinct values are stored as categories
+CATEGORICAL_RATIO = 0.5
+
+
+@timed("csv loading")
+def read_csv_cached(path, categorical=True, **read_csv_kwargs):
+    """
+    Reads a CSV through a Feather cache stored next to it (<path>.cache.feather).
+
+    The cache is keyed on the size, mtime and content hash of the CSV. When size and
+    mtime match, the cache is memory-mapped without touching the CSV; when only the
+    mtime changed, the CSV is hashed and the cache is reused if the content is the same.
+    Anything else re-parses the CSV and rewrites the cache.
+
+    Parameters:
+        path (str): CSV file
+        categorical (bool): store repetitive string columns as pandas categories
+        read_csv_kwargs: passed to pd.read_csv when the CSV has to be parsed
+
+    Returns:
+        pd.DataFrame
+
+    """
+    if feather is None:
+        return pd.read_csv(path, **read_csv_kwargs)
+
+    cache_path = path + CACHE_SUFFIX
+    options = {'categorical': categorical, 'read_csv_kwargs': repr(sorted(read_csv_kwargs.items()))}
+
+    if os.path.exists(cache_path):
+        try:
+            table = feather.read_table(cache_path, memory_map=True)
+            cached = json.loads((table.schema.metadata or {}).get(FINGERPRINT_KEY, b'{}'))
+        except (OSError, pa.ArrowInvalid, ValueError):
+            table, cached = None, {}
+
+        if table is not None and cached.get('options') == options and fingerprint_matches(cached, path):
+            mtime_ns = os.stat(path).st_mtime_ns
+            if cached.get('mtime_ns') != mtime_ns:
+                # Same content with a new mtime (e.g. a fresh checkout), refresh the key
+                cached['mtime_ns'] = mtime_ns
+                _write_cache(table, cache_path, cached)
+            return table.to_pandas()
+
+    df = pd.read_csv(path, **read_csv_kwargs)
+    if categorical:
+        df = to_categorical(df)
+
+    fingerprint = {**source_fingerprint(path), 'options': options}
+    _write_cache(pa.Table.from_pandas(df, preserve_index=False), cache_path, fingerprint)
+
+    return df
+
+
+def to_categorical(df, ratio=CATEGORICAL_RATIO):
+    """
+    Converts the string columns of df with few distinct values to categories.
+    """
+    for column in df.columns:
+        values = df[column]
+        if (pd.api.types.is_string_dtype(values) or values.dtype == object) and len(values):
+            if values.nunique(dropna=True) <= ratio * len(values):
+                df[column] = values.astype('category')
+    return df
+
+
+def source_fingerprint(path):
+    """
+    Size, mtime and content hash of a file, the key a cache derived from it is stored under.
+    """
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(path)}
+
+
+def fingerprint_matches(fingerprint, path):
+    """
+    Whether a file still matches a source_fingerprint taken earlier: the same size and
+    either the same mtime or, only hashed when the mtime changed, the same content.
+    """
+    stat = os.stat(path)
+    if fingerprint.get('size') != stat.st_size:
+        return False
+    return fingerprint.get('mtime_ns') == stat.st_mtime_ns or fingerprint.get('sha256') == file_hash(path)
+
+
+def write_atomically(path, write, suffix='.tmp'):
+    """
+    Calls write(tmp_path) on a temporary file next to path and swaps it in, so readers
+    never see a partial cache. Returns False if the directory is not writable, which
+    just means no cache.
+
+    Parameters:
+        path (str): file to (re)place
+        write (callable): writes the content to the path it is given
+        suffix (str): ending of the temporary file, for writers that append an extension
+
+    """
+    tmp_path = f'{path}.{os.getpid()}{suffix}'
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def file_hash(path, block_size=1 << 20):
+    """
+    SHA-256 of a file's content, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_cache(table, cache_path, fingerprint):
+    metadata = dict(table.schema.metadata or {})
+    metadata[FINGERPRINT_KEY] = json.dumps(fingerprint).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Uncompressed so later reads can memory-map it
+    write_atomically(cache_path, lambda tmp_path: feather.write_feather(table, tmp_path, compression='uncompressed'))
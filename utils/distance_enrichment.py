@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.geo_distance import paired_distance
+
+
+class CoordinateLookup:
+    """
+    AIRPORT_ID -> (latitude, longitude) as sorted arrays, looked up with a binary
+    search per chunk instead of a per-row dict or DataFrame join.
+
+    Parameters:
+        airports_df (pd.DataFrame): airport_info table, the last record wins for repeated IDs
+
+    """
+
+    def __init__(self, airports_df):
+        latest = airports_df.drop_duplicates(subset='AIRPORT_ID', keep='last').sort_values('AIRPORT_ID')
+        self.ids = latest['AIRPORT_ID'].to_numpy(dtype=np.int64)
+        self.lats = latest['LATITUDE'].to_numpy(dtype=np.float64)
+        self.lons = latest['LONGITUDE'].to_numpy(dtype=np.float64)
+
+    def coordinates(self, airport_ids):
+        """
+        Returns (lats, lons) of airport_ids, NaN for unknown or missing IDs.
+        """
+        ids = pd.to_numeric(pd.Series(airport_ids), errors='coerce').to_numpy(dtype=np.float64)
+        lats = np.full(len(ids), np.nan)
+        lons = np.full(len(ids), np.nan)
+        if not len(self.ids):
+            return lats, lons
+
+        known = np.flatnonzero(~np.isnan(ids))
+        keys = ids[known].astype(np.int64)
+        positions = np.minimum(np.searchsorted(self.ids, keys), len(self.ids) - 1)
+        hit = self.ids[positions] == keys
+        lats[known[hit]] = self.lats[positions[hit]]
+        lons[known[hit]] = self.lons[positions[hit]]
+        return lats, lons
+
+
+def count_missing_distances(path, chunksize=1_000_000):
+    """
+    Number of rows of a flights CSV without a valid DISTANCE, reading only that
+    column (every row if the column does not exist).
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    if 'DISTANCE' not in header:
+        return _count_rows(path, chunksize)
+
+    missing = 0
+    for chunk in pd.read_csv(path, usecols=['DISTANCE'], chunksize=chunksize):
+        missing += int((~_valid_distances(chunk['DISTANCE'])).sum())
+    return missing
+
+
+def add_distances(path, airports_df, output_path=None, chunksize=500_000):
+    """
+    Fills in the DISTANCE column (haversine km) of a flights CSV, streaming it in chunks.
+
+    Rows that already have a valid (finite, non-negative) DISTANCE are kept as they
+    are and every other column is copied through as text, so memory stays bounded by
+    the chunk size. The result is written to a temporary file and moved onto
+    output_path, so readers never see a partial file. When output_path is the input
+    and no distance could be added, the input is left untouched.
+
+    Parameters:
+        path (str): flights CSV with ORIGIN_AIRPORT_ID and DEST_AIRPORT_ID
+        airports_df (pd.DataFrame): airport_info table with AIRPORT_ID, LATITUDE, LONGITUDE
+        output_path (str, optional): enriched CSV, the input file if None
+        chunksize (int): rows processed at a time
+
+    Returns:
+        (rows, computed): number of rows and number of distances computed
+
+    """
+    output_path = output_path or path
+    same_file = os.path.abspath(output_path) == os.path.abspath(path)
+    if same_file and count_missing_distances(path) == 0:
+        return _count_rows(path), 0
+
+    lookup = CoordinateLookup(airports_df)
+    tmp_path = f'{output_path}.{os.getpid()}.tmp'
+    rows = computed = 0
+    try:
+        # every column as the original text, only the IDs and DISTANCE are parsed
+        reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize)
+        for i, chunk in enumerate(reader):
+            existing = chunk['DISTANCE'] if 'DISTANCE' in chunk else pd.Series('', index=chunk.index)
+            missing = ~_valid_distances(existing).to_numpy()
+
+            distances = existing.to_numpy(dtype=object).copy()
+            if missing.any():
+                origin_lats, origin_lons = lookup.coordinates(chunk['ORIGIN_AIRPORT_ID'].to_numpy()[missing])
+                dest_lats, dest_lons = lookup.coordinates(chunk['DEST_AIRPORT_ID'].to_numpy()[missing])
+                values = paired_distance(origin_lats, origin_lons, dest_lats, dest_lons)
+                distances[missing] = np.where(np.isnan(values), '', values.astype(str))
+                computed += int(np.count_nonzero(~np.isnan(values)))
+
+            chunk['DISTANCE'] = distances
+            chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(chunk)
+
+        if rows == 0:
+            pd.read_csv(path, nrows=0).assign(DISTANCE=[]).to_csv(tmp_path, index=False)
+        # the remaining gaps have no coordinates, an identical file is not swapped in
+        if computed or not same_file:
+            os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return rows, computed
+
+
+def _valid_distances(values):
+    distances = pd.to_numeric(values, errors='coerce')
+    return np.isfinite(distances) & (distances >= 0)
+
+
+def _count_rows(path, chunksize=1_000_000):
+    return sum(len(chunk) for chunk in pd.read_csv(path, usecols=[0], chunksize=chunksize))
@@ -0,0 +1,13 @@
+def agg_figure(figsize):
+    """
+    Returns a matplotlib Figure on its own Agg canvas, drawn and saved without pyplot
+    or a display.
+
+    matplotlib is imported on the first figure, so runs without graphs never load it.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+ROUTE_KEY = ['ORIGIN_AIRPORT_ID', 'DEST_AIRPORT_ID']
+ROUTE_COLUMNS = ROUTE_KEY + ['FREQUENCY', 'NUM_CARRIERS', 'NUM_MONTHS', 'MONTH_MASK', 'MEAN_DISTANCE']
+
+
+class RouteAggregator:
+    """
+    Streams flight records into a weighted edge table, one chunk at a time.
+
+    Memory is bounded by the number of distinct routes (and route/carrier pairs),
+    not by the number of flight rows, so multi-year BTS dumps can be fed through
+    in chunks that fit in RAM.
+
+    Per route (ORIGIN_AIRPORT_ID -> DEST_AIRPORT_ID) it keeps:
+        FREQUENCY: number of flight records
+        NUM_CARRIERS: distinct UNIQUE_CARRIER values
+        NUM_MONTHS / MONTH_MASK: distinct MONTH values, as a count and a bitmask (bit m-1 for month m)
+        MEAN_DISTANCE: mean DISTANCE over the records that have one
+
+    """
+
+    def __init__(self):
+        self._totals = None
+        self._carriers = None
+
+    def add(self, chunk):
+        """
+        Folds a DataFrame of flight records into the running totals.
+        """
+        chunk = chunk.dropna(subset=ROUTE_KEY)
+        if chunk.empty:
+            return
+
+        routes = pd.DataFrame({
+            'ORIGIN_AIRPORT_ID': chunk['ORIGIN_AIRPORT_ID'].to_numpy(dtype=np.int64),
+            'DEST_AIRPORT_ID': chunk['DEST_AIRPORT_ID'].to_numpy(dtype=np.int64),
+            'FREQUENCY': 1,
+            'MONTH_MASK': _month_bits(chunk['MONTH']) if 'MONTH' in chunk else 0,
+            'DISTANCE_SUM': chunk['DISTANCE'].fillna(0).to_numpy(dtype=np.float64) if 'DISTANCE' in chunk else 0.0,
+            'DISTANCE_COUNT': chunk['DISTANCE'].notna().to_numpy(dtype=np.int64) if 'DISTANCE' in chunk else 0,
+        })
+        totals = routes.groupby(ROUTE_KEY).agg(
+            FREQUENCY=('FREQUENCY', 'sum'),
+            DISTANCE_SUM=('DISTANCE_SUM', 'sum'),
+            DISTANCE_COUNT=('DISTANCE_COUNT', 'sum'),
+        )
+        # The distinct month bits of a route sum to their bitwise OR
+        months = routes[ROUTE_KEY + ['MONTH_MASK']].drop_duplicates()
+        totals['MONTH_MASK'] = months.groupby(ROUTE_KEY)['MONTH_MASK'].sum()
+        self._totals = totals if self._totals is None else _combine(self._totals, totals)
+
+        if 'UNIQUE_CARRIER' in chunk:
+            carriers = pd.DataFrame({
+                'ORIGIN_AIRPORT_ID': routes['ORIGIN_AIRPORT_ID'],
+                'DEST_AIRPORT_ID': routes['DEST_AIRPORT_ID'],
+                'UNIQUE_CARRIER': chunk['UNIQUE_CARRIER'].astype(str).to_numpy(),
+            }).drop_duplicates()
+            if self._carriers is not None:
+                carriers = pd.concat([self._carriers, carriers], ignore_index=True).drop_duplicates()
+            self._carriers = carriers
+
+    def result(self):
+        """
+        Returns the weighted edge table with one row per route, in ROUTE_COLUMNS order.
+        """
+        if self._totals is None:
+            return pd.DataFrame(columns=ROUTE_COLUMNS)
+
+        routes = self._totals.copy()
+        if self._carriers is not None:
+            routes['NUM_CARRIERS'] = self._carriers.groupby(ROUTE_KEY).size()
+        else:
+            routes['NUM_CARRIERS'] = 0
+        routes['NUM_CARRIERS'] = routes['NUM_CARRIERS'].fillna(0).astype(np.int64)
+        routes['NUM_MONTHS'] = _popcount(routes['MONTH_MASK'].to_numpy())
+        routes['MEAN_DISTANCE'] = routes['DISTANCE_SUM'] / routes['DISTANCE_COUNT'].where(routes['DISTANCE_COUNT'] > 0)
+
+        return routes.reset_index()[ROUTE_COLUMNS]
+
+
+def aggregate_routes(path, chunksize=500_000):
+    """
+    Builds the weighted edge table of a flights CSV in a single streaming pass.
+
+    Parameters:
+        path (str): flights CSV with ORIGIN_AIRPORT_ID, DEST_AIRPORT_ID and optionally
+                    UNIQUE_CARRIER, MONTH and DISTANCE columns
+        chunksize (int): rows parsed at a time
+
+    Returns:
+        pd.DataFrame with one row per route (see RouteAggregator)
+
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in ROUTE_KEY + ['UNIQUE_CARRIER', 'MONTH', 'DISTANCE'] if c in header]
+
+    aggregator = RouteAggregator()
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize, dtype={'UNIQUE_CARRIER': str}):
+        aggregator.add(chunk)
+
+    return aggregator.result()
+
+
+def _combine(left, right):
+    # Sum the counters and OR the month masks of two per-route tables
+    combined = left.add(right, fill_value=0)
+    for column in ['FREQUENCY', 'MONTH_MASK', 'DISTANCE_COUNT']:
+        combined[column] = combined[column].astype(np.int64)
+    left_mask = left['MONTH_MASK'].reindex(combined.index, fill_value=0).to_numpy()
+    right_mask = right['MONTH_MASK'].reindex(combined.index, fill_value=0).to_numpy()
+    combined['MONTH_MASK'] = left_mask | right_mask
+    return combined
+
+
+def _month_bits(months):
+    months = pd.to_numeric(months, errors='coerce')
+    valid = months.between(1, 12)
+    return np.where(valid, np.left_shift(1, months.where(valid, 1).astype(np.int64) - 1), 0)
+
+
+def _popcount(masks):
+    masks = np.asarray(masks, dtype=np.int64)
+    return sum((masks >> bit) & 1 for bit in range(12))
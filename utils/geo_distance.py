@@ -0,0 +1,98 @@
+import numpy as np
+
+# Mean earth radius used by the haversine formula
+EARTH_RADIUS_KM = 6371.0
+KM_PER_MILE = 1.609344
+
+# WGS-84 ellipsoid, the default model of geopy's geodesic
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+
+def paired_distance(lat1, lon1, lat2, lon2, method="haversine", unit="km"):
+    """
+    Distance between each pair of points (lat1[i], lon1[i]) and (lat2[i], lon2[i]).
+
+    Parameters:
+        lat1, lon1, lat2, lon2 (array-like): coordinates in degrees, broadcastable to one shape
+        method (str): 'haversine' for the spherical formula or 'ellipsoidal' for the WGS-84
+                      geodesic (Vincenty, with geopy's Karney solver for points it can't solve)
+        unit (str): 'km' or 'miles'
+
+    Returns:
+        np.ndarray of distances, NaN where a coordinate is missing
+
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (lat1, lon1, lat2, lon2))
+    )
+    if method == "haversine":
+        distance = _haversine_km(lat1, lon1, lat2, lon2)
+    elif method == "ellipsoidal":
+        distance = _vincenty_km(lat1, lon1, lat2, lon2)
+    else:
+        raise ValueError(f"Unknown distance method: {method}")
+
+    return _convert(distance, unit)
+
+
+def _convert(distance_km, unit):
+    if unit == "km":
+        return distance_km
+    if unit == "miles":
+        return distance_km / KM_PER_MILE
+    raise ValueError(f"Unknown distance unit: {unit}")
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _vincenty_km(lat1, lon1, lat2, lon2, tolerance=1e-12, max_iterations=200):
+    # Vincenty's inverse formula on WGS-84, iterated for all pairs at once
+    f, a, b = WGS84_F, WGS84_A, WGS84_B
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sinU1, cosU1, sinU2, cosU2 = np.sin(U1), np.cos(U1), np.sin(U2), np.cos(U2)
+
+    lam = L
+    converged = np.zeros(L.shape, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_prev = lam
+            lam = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+            )
+            converged = np.abs(lam - lam_prev) <= tolerance
+            if np.all(converged | np.isnan(lam)):
+                break
+
+        u2 = cos2_alpha * (a ** 2 - b ** 2) / b ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+        ))
+        distance = b * A * (sigma - delta_sigma) / 1000
+
+    # Vincenty does not converge for nearly antipodal points, solve those with Karney
+    unsolved = ~converged & ~np.isnan(distance)
+    if unsolved.any():
+        from geopy.distance import geodesic
+        for i in map(tuple, np.argwhere(unsolved)):
+            distance[i] = geodesic((lat1[i], lon1[i]), (lat2[i], lon2[i])).km
+
+    return distance
@@ -0,0 +1,232 @@
+import os
+import json
+
+import numpy as np
+
+from utils.dataset_loader import read_csv_cached, source_fingerprint, fingerprint_matches, write_atomically
+from utils.figures import agg_figure
+
+# States and territories left off the basemap (only the main 50 states are drawn)
+EXCLUDED_STATES = ['VI', 'MP', 'GU', 'AS', 'PR']
+
+# Longitudes kept in a heatmap, cutting off Alaska's western islands
+WEST_CUTOFF = -178.281323
+EAST_CUTOFF = -48.378977
+
+# Grid resolutions binned in one pass, each one a divisor of the finest
+PYRAMID_LEVELS = (75, 150, 300, 600)
+DEFAULT_BINS = 150
+
+BASEMAP_SUFFIX = '.basemap.npz'
+HEATMAP_SUFFIX = '.heatmap.npz'
+
+
+class Basemap:
+    """
+    Outlines of the states as polygon rings (exteriors and holes), read from the
+    shapefile once and cached next to it (<shapefile>.basemap.npz), so drawing a map
+    is an array load instead of a geopandas read.
+
+    Parameters:
+        coordinates (np.ndarray): (n, 2) longitude, latitude of every ring point
+        offsets (np.ndarray): start of every ring in coordinates, plus the end
+
+    """
+
+    def __init__(self, coordinates, offsets):
+        self.coordinates = coordinates
+        self.offsets = offsets
+
+    @property
+    def rings(self):
+        return [self.coordinates[start:stop] for start, stop in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def draw(self, ax):
+        # matplotlib is imported with the figure (see figures.agg_figure)
+        from matplotlib.collections import PolyCollection
+
+        ax.add_collection(PolyCollection(self.rings, facecolor='white', edgecolor='black'))
+        ax.autoscale_view()
+
+
+def load_basemap(shapefile, excluded=EXCLUDED_STATES):
+    """
+    Returns the Basemap of a state shapefile without the excluded STUSPS codes,
+    read with geopandas only when the cache is missing or the shapefile changed.
+    """
+    sources = [path for path in (_sibling(shapefile, ext) for ext in ('.shp', '.shx', '.dbf')) if os.path.exists(path)]
+    options = {'excluded': sorted(excluded)}
+    cache_path = shapefile + BASEMAP_SUFFIX
+
+    cached = _read_cache(cache_path, sources, options)
+    if cached is not None:
+        return Basemap(cached['coordinates'], cached['offsets'])
+
+    import geopandas as gp
+    import shapely
+
+    states = gp.read_file(shapefile)
+    states = states[~states['STUSPS'].isin(excluded)]
+    rings = shapely.get_rings(shapely.get_parts(states.geometry.to_numpy()))
+    offsets = np.concatenate([[0], np.cumsum(shapely.get_num_coordinates(rings))])
+    basemap = Basemap(shapely.get_coordinates(rings), offsets)
+
+    _write_cache(cache_path, sources, options, coordinates=basemap.coordinates, offsets=basemap.offsets)
+    return basemap
+
+
+class HeatmapPyramid:
+    """
+    Weighted point counts binned over a latitude/longitude grid at several
+    resolutions. The points are binned once at the finest resolution and every
+    coarser grid is summed from it in blocks, so all levels share the same extent
+    and bin edges.
+
+    Parameters:
+        grids (dict): bins -> (bins, bins) array, rows by latitude, columns by longitude
+        extent (tuple): (lat_min, lat_max, lon_min, lon_max) of the grids
+
+    """
+
+    def __init__(self, grids, extent):
+        self.grids = grids
+        self.extent = extent
+
+    @classmethod
+    def build(cls, lats, lons, weights, levels=PYRAMID_LEVELS):
+        finest = max(levels)
+        if any(finest % bins for bins in levels):
+            raise ValueError(f"every level has to divide the finest one ({finest}): {levels}")
+
+        extent = (float(lats.min()), float(lats.max()), float(lons.min()), float(lons.max()))
+        grid, _, _ = np.histogram2d(
+            lats, lons, bins=finest, range=[extent[:2], extent[2:]], weights=weights
+        )
+        grids = {}
+        for bins in sorted(levels):
+            block = finest // bins
+            grids[bins] = grid.reshape(bins, block, bins, block).sum(axis=(1, 3))
+        return cls(grids, extent)
+
+
+def heatmap_pyramid(path, lat_column, lon_column, weight_column, where=None, levels=PYRAMID_LEVELS):
+    """
+    Returns the HeatmapPyramid of a CSV of points, weighted by weight_column scaled
+    to 0..1 over the points kept. Points without coordinates or weight, outside
+    WEST_CUTOFF..EAST_CUTOFF or not matching where are left out.
+
+    The grids are cached next to the CSV (<path>.<weight_column>.heatmap.npz),
+    keyed on the CSV content and the options, so an unchanged input is not reread.
+
+    Parameters:
+        path (str): CSV file
+        lat_column, lon_column, weight_column (str): columns of the CSV
+        where (dict, optional): column -> value the kept rows must have
+        levels (tuple): grid resolutions, each dividing the largest
+
+    Returns:
+        HeatmapPyramid
+
+    """
+    where = where or {}
+    options = {
+        'columns': [lat_column, lon_column, weight_column], 'where': sorted(where.items()),
+        'longitudes': [WEST_CUTOFF, EAST_CUTOFF], 'levels': sorted(levels),
+    }
+    cache_path = f'{path}.{weight_column}{HEATMAP_SUFFIX}'
+
+    cached = _read_cache(cache_path, [path], options)
+    if cached is not None:
+        grids = {bins: cached[f'grid_{bins}'] for bins in levels}
+        return HeatmapPyramid(grids, tuple(cached['extent'].tolist()))
+
+    df = read_csv_cached(path, categorical=False)
+    lats = df[lat_column].to_numpy(dtype=np.float64)
+    lons = df[lon_column].to_numpy(dtype=np.float64)
+    weights = df[weight_column].to_numpy(dtype=np.float64)
+
+    # one mask over the arrays, the weights stay aligned with the points
+    keep = ~(np.isnan(lats) | np.isnan(lons) | np.isnan(weights))
+    keep &= (lons >= WEST_CUTOFF) & (lons <= EAST_CUTOFF)
+    for column, value in where.items():
+        keep &= (df[column] == value).to_numpy(dtype=bool, na_value=False)
+    lats, lons, weights = lats[keep], lons[keep], weights[keep]
+    if not len(lats):
+        raise ValueError(f"no points left in {path} to bin")
+
+    # min-max scaling, a constant weight scales to 0
+    spread = weights.max() - weights.min()
+    weights = (weights - weights.min()) / spread if spread > 0 else np.zeros_like(weights)
+
+    pyramid = HeatmapPyramid.build(lats, lons, weights, levels)
+    _write_cache(
+        cache_path, [path], options, extent=np.array(pyramid.extent),
+        **{f'grid_{bins}': grid for bins, grid in pyramid.grids.items()}
+    )
+    return pyramid
+
+
+def render_heatmap(pyramid, bins, title, filename, basemap=None):
+    """
+    Draws one level of a HeatmapPyramid over the basemap and saves it as filename,
+    without a display (no pyplot).
+    """
+    lat_min, lat_max, lon_min, lon_max = pyramid.extent
+
+    fig = agg_figure(figsize=(15, 9))
+    ax = fig.add_subplot()
+    if basemap is not None:
+        basemap.draw(ax)
+
+    image = ax.imshow(
+        pyramid.grids[bins],
+        cmap='rainbow',
+        extent=[lon_min, lon_max, lat_max, lat_min],
+        zorder=2,
+        alpha=0.8,
+        interpolation='quadric',
+        vmax=0.5
+    )
+
+    # format output
+    ax.get_xaxis().set_visible(False)
+    ax.get_yaxis().set_visible(False)
+    ax.set_title(title)
+    ax.patch.set_facecolor("black")
+    ax.invert_yaxis()
+    fig.colorbar(image, ax=ax)
+
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    fig.savefig(filename)
+    return filename
+
+
+def _sibling(path, extension):
+    return os.path.splitext(path)[0] + extension
+
+
+def _read_cache(cache_path, sources, options):
+    # the cached arrays if the sources still match their fingerprints and the options are the same
+    if not sources or not os.path.exists(cache_path):
+        return None
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            cached = {name: data[name] for name in data.files}
+        fingerprint = json.loads(str(cached.pop('fingerprint')))
+    except (OSError, ValueError, KeyError):
+        return None
+
+    if fingerprint.get('options') != json.loads(json.dumps(options)) or len(fingerprint.get('files', [])) != len(sources):
+        return None
+    if not all(fingerprint_matches(entry, path) for entry, path in zip(fingerprint['files'], sources)):
+        return None
+    return cached
+
+
+def _write_cache(cache_path, sources, options, **arrays):
+    fingerprint = {'files': [source_fingerprint(path) for path in sources], 'options': options}
+    # np.savez appends .npz to any other name
+    write_atomically(
+        cache_path, lambda tmp_path: np.savez(tmp_path, fingerprint=np.array(json.dumps(fingerprint)), **arrays),
+        suffix='.tmp.npz'
+    )
@@ -0,0 +1,267 @@
+import numpy as np
+
+from utils.csr_graph import CSRGraph, UNREACHABLE, _ranges
+from utils.reachability import ReachabilityIndex
+from utils.profiling import span
+
+# Stats key of the 95% confidence half-width when betweenness is sampled
+BETWEENNESS_CI = "Average Betweenness Centrality 95% CI"
+
+# Stats key of the mean in plus out route weight per airport, only on a weighted graph
+WEIGHTED_DEGREE = "Average Weighted Degree"
+
+# Weight of a proposed route of a candidate airport (one flight, carrier or month),
+# as CSRGraph.with_node gives it
+NEW_ROUTE_WEIGHT = 1.0
+
+
+class IncrementalNetworkStats:
+    """
+    Evaluates the network stats of a baseline graph plus one new airport without
+    copying the graph or rerunning the full all-pairs computations.
+
+    The baseline state is built once: the reachability index of the strongly
+    connected components (see utils/reachability.py), the BFS distance rows of the
+    betweenness sources (reused for every candidate) and the per-node triangle counts
+    and degrees of the undirected graph. A candidate airport only adds paths that pass
+    through it, so the updated distances are min(d(s, t), d(s, T) + 2 + d(T, t)) where
+    T is the set of airports it connects to, and only the clustering of the nodes in T
+    changes.
+
+    On a weighted graph (see CSRGraph.from_routes) the stats also hold the average
+    weighted degree, with every proposed route of a candidate weighing NEW_ROUTE_WEIGHT.
+    Connectivity, betweenness and clustering stay hop-based.
+
+    Betweenness uses the identity that node betweenness summed over the graph equals
+    the sum of d(s, t) - 1 over the reachable pairs s != t. With pivots it is estimated
+    Brandes-Pich style from those source rows only, with a 95% confidence interval;
+    the same pivots are used for the baseline and every candidate so that the percent
+    changes stay comparable.
+
+    Parameters:
+        G (CSRGraph or nx.DiGraph): baseline flight network
+        pivots (iterable, optional): AIRPORT_IDs to sample betweenness from (see sample_pivots),
+                                     exact betweenness if None
+
+    """
+
+    def __init__(self, G, pivots=None):
+        self.graph = G if isinstance(G, CSRGraph) else CSRGraph.from_networkx(G)
+        self.index = self.graph.index
+        with span("reachability"):
+            self.reachability = ReachabilityIndex(self.graph)
+
+        if pivots is None:
+            self.sources = np.arange(len(self.graph))
+        else:
+            self.sources = np.array(sorted({self.index[p] for p in pivots if p in self.index}), dtype=np.int64)
+
+        # d(s, t) per source row, only the pivots when betweenness is sampled
+        with span("distance BFS"):
+            self.distances = np.stack([self.graph.bfs_distances(s) for s in self.sources]) if len(self.sources) else \
+                np.empty((0, len(self.graph)), dtype=np.int32)
+        self._target_rows = {}
+
+        # total route weight, None on an unweighted graph
+        self.weight_sum = None if self.graph.weights is None else float(self.graph.weights.sum())
+
+        with span("clustering"):
+            self.undirected = self.graph.undirected()
+            self.degree = self.undirected.out_degree()
+            self.triangles = self.graph.triangles()
+            self.clustering = _clustering(self.triangles, self.degree)
+
+    @property
+    def sampled(self):
+        return len(self.sources) < len(self.graph)
+
+    def baseline_stats(self):
+        """
+        Returns the stats dict of the baseline graph, matching print_network_stats.
+        """
+        n = len(self.graph)
+        with span("betweenness"):
+            dependencies = _dependency_sums(self.distances)
+        return self._stats(n, self.reachability.reachable_pairs(), dependencies, 0, float(self.clustering.sum()))
+
+    def candidate_stats(self, candidate_airport, airport_ids):
+        """
+        Returns the stats dict of the baseline graph with candidate_airport added and
+        connected in both directions to every airport in airport_ids.
+
+        Parameters:
+            candidate_airport: AIRPORT_ID of the new airport
+            airport_ids (iterable): AIRPORT_IDs the new airport gets flights to and from
+
+        Returns:
+            dict with the same keys as print_network_stats
+
+        """
+        if candidate_airport in self.index:
+            # Existing node gaining edges is not the single-new-node case, fall back
+            graph = self.graph.with_node(candidate_airport, airport_ids, weight=NEW_ROUTE_WEIGHT)
+            pivots = None if not self.sampled else self.graph.node_ids[self.sources]
+            return IncrementalNetworkStats(graph, pivots).baseline_stats()
+
+        targets = list(dict.fromkeys(airport_ids))
+        old = np.array([self.index[a] for a in targets if a in self.index], dtype=np.int64)
+        m = sum(1 for a in targets if a not in self.index)
+        n = len(self.graph)
+
+        with span("reachability"):
+            # Reachability: existing pairs newly connected through the candidate, plus
+            # every pair involving the candidate and the m new target airports
+            num_reachable_pairs = self.reachability.candidate_pairs(old, m)
+
+        with span("betweenness"):
+            # d(s, T) and d(T, t) through the existing targets
+            rows = self.distances
+            if len(old):
+                to_targets = rows[:, old].min(axis=1)
+                from_targets = self._distances_from(old).min(axis=0)
+                rows = np.minimum(rows, to_targets[:, None] + 2 + from_targets[None, :])
+            else:
+                to_targets = np.full(len(self.sources), UNREACHABLE, dtype=np.int32)
+                from_targets = np.full(n, UNREACHABLE, dtype=np.int32)
+            into = to_targets < UNREACHABLE
+            out = from_targets < UNREACHABLE
+            num_out = int(out.sum())
+
+            # Betweenness: rerouted source rows of the existing airports, plus the pairs
+            # ending at the candidate (d(s, T) + 1) and at the new targets (d(s, T) + 2)
+            to_new = np.where(into, to_targets, 0).astype(np.int64)
+            dependencies = _dependency_sums(rows) + to_new + m * (to_new + into)
+
+            # rows of the new nodes are known exactly: d(c, t) = d(T, t) + 1, d(t', t) = d(T, t) + 2
+            out_sum = int(from_targets[out].sum())
+            new_dependencies = out_sum + m * (out_sum + num_out + m - 1)
+
+        with span("clustering"):
+            # Only the candidate and its existing targets change clustering
+            U = self.undirected
+            edge_rows = np.repeat(np.arange(len(old)), U.indptr[old + 1] - U.indptr[old])
+            neighbors = U.indices[_ranges(U.indptr[old], U.indptr[old + 1])]
+            shared = np.bincount(edge_rows[np.isin(neighbors, old)], minlength=len(old))
+            clustering_sum = float(self.clustering.sum())
+            if len(old):
+                clustering_sum -= float(self.clustering[old].sum())
+                clustering_sum += float(_clustering(self.triangles[old] + shared, self.degree[old] + 1).sum())
+            candidate_degree = len(targets)
+            candidate_triangles = int(shared.sum()) // 2
+            clustering_sum += float(_clustering(np.array([candidate_triangles]), np.array([candidate_degree]))[0])
+
+        # a route each way between the candidate and every target
+        added_weight = 2 * len(targets) * NEW_ROUTE_WEIGHT
+        return self._stats(n + 1 + m, num_reachable_pairs, dependencies, new_dependencies, clustering_sum,
+                           added_weight)
+
+    def _distances_from(self, nodes):
+        # BFS rows of the target airports, read from the source rows when every node is
+        # a source and otherwise computed once per target (candidates share their hubs)
+        if not self.sampled:
+            return self.distances[nodes]
+        for node in nodes.tolist():
+            if node not in self._target_rows:
+                self._target_rows[node] = self.graph.bfs_distances(node)
+        return np.stack([self._target_rows[node] for node in nodes.tolist()])
+
+    def _stats(self, n_total, num_reachable_pairs, dependencies, new_dependencies, clustering_sum, added_weight=0.0):
+        # dependencies holds sum(d(s, t) - 1) for each source row of the existing
+        # airports (all of them, or the pivots), new_dependencies the exact sum over
+        # the rows of added nodes
+        n = len(self.graph)
+        k = len(dependencies)
+        betweenness_sum = n / k * float(dependencies.sum()) + new_dependencies if k else new_dependencies
+        stats = _stats_dict(n_total, num_reachable_pairs, betweenness_sum, clustering_sum)
+        if self.weight_sum is not None:
+            # every route weight counts once at its origin and once at its destination
+            stats[WEIGHTED_DEGREE] = 2 * (self.weight_sum + added_weight) / n_total if n_total else 0.0
+
+        if self.sampled:
+            # normal interval on the sampled mean, with the finite population correction
+            spread = float(dependencies.std(ddof=1)) if k > 1 else 0.0
+            half_width = 1.96 * n * spread / np.sqrt(k) * np.sqrt((n - k) / (n - 1)) if k else float('inf')
+            stats[BETWEENNESS_CI] = float(half_width * _betweenness_scale(n_total))
+        return stats
+
+
+def sample_pivots(G, k, seed=0):
+    """
+    Samples k source pivots for approximate betweenness, reproducibly for a seed.
+
+    Parameters:
+        G (CSRGraph): baseline flight network
+        k (int): number of pivots, all nodes if k >= number of nodes
+        seed (int): random seed
+
+    Returns:
+        np.ndarray of AIRPORT_IDs, to pass to IncrementalNetworkStats for the baseline
+        and every candidate
+
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(G))
+    return np.sort(G.node_ids[rng.choice(len(G), size=k, replace=False)])
+
+
+def compute_network_stats(G, pivots=None):
+    """
+    Computes the network stats of G from scratch, on the CSR arrays for a CSRGraph
+    and with networkx otherwise. pivots samples the betweenness of a CSRGraph (see
+    IncrementalNetworkStats).
+
+    Returns:
+        dict with Connectivity/Reachability, Average Betweenness Centrality
+        and Global Clustering Coefficient
+
+    """
+    if isinstance(G, CSRGraph):
+        return IncrementalNetworkStats(G, pivots).baseline_stats()
+
+    import networkx as nx
+
+    num_reachable_pairs = ReachabilityIndex(CSRGraph.from_networkx(G)).reachable_pairs()
+    total_possible_pairs = len(G) * (len(G) - 1)
+    connectivity = num_reachable_pairs / total_possible_pairs if total_possible_pairs > 0 else 0
+
+    betweenness_centrality = nx.betweenness_centrality(G)
+    avg_betweenness = sum(betweenness_centrality.values()) / len(betweenness_centrality)
+
+    clustering_coefficient = nx.average_clustering(G.to_undirected())
+
+    return {
+        "Connectivity/Reachability": connectivity,
+        "Average Betweenness Centrality": avg_betweenness,
+        "Global Clustering Coefficient": clustering_coefficient
+    }
+
+
+def _clustering(triangles, degree):
+    denominator = degree * (degree - 1)
+    return np.divide(2.0 * triangles, denominator, out=np.zeros(len(degree)), where=denominator > 0)
+
+
+def _dependency_sums(rows):
+    # sum of d(s, t) - 1 over the reachable t != s of each source row (d(s, s) = 0)
+    reachable = rows < UNREACHABLE
+    return np.where(reachable, rows, 0).sum(axis=1, dtype=np.int64) - (reachable.sum(axis=1) - 1)
+
+
+def _betweenness_scale(n):
+    # nx.betweenness_centrality normalization for directed graphs, averaged over n nodes
+    return 1 / ((n - 1) * (n - 2)) / n if n > 2 else (1 / n if n > 0 else 0)
+
+
+def _stats_dict(n, num_reachable_pairs, betweenness_sum, clustering_sum):
+    # num_reachable_pairs counts every node reaching itself, as the BFS count in
+    # print_network_stats does, and betweenness_sum is the betweenness summed over nodes
+    total_possible_pairs = n * (n - 1)
+    connectivity = num_reachable_pairs / total_possible_pairs if total_possible_pairs > 0 else 0
+    avg_betweenness = betweenness_sum * _betweenness_scale(n)
+    clustering_coefficient = clustering_sum / n if n > 0 else 0
+
+    return {
+        "Connectivity/Reachability": connectivity,
+        "Average Betweenness Centrality": avg_betweenness,
+        "Global Clustering Coefficient": clustering_coefficient
+    }
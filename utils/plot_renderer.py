@@ -0,0 +1,196 @@
+import os
+import csv
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.figures import agg_figure
+from utils.network_stats import BETWEENNESS_CI
+from utils.profiling import timed
+
+# Stats keys that are not plotted as percent changes
+EXCLUDED_STATS = ["Number of Nodes", "Number of Edges", BETWEENNESS_CI]
+
+
+class PlotRenderer:
+    """
+    Renders the percent change graphs of the candidate cities off the analysis loop.
+
+    submit() only computes the percent changes and queues the PNG for a pool of
+    worker processes (each figure is drawn on its own Agg canvas, pyplot is not
+    used), so the graph math never waits on figure layout, PNG encoding or disk.
+    With summary_only no per-city PNGs are drawn; close() writes one multi-panel
+    figure of all cities plus percent_changes.csv and percent_changes.json.
+
+    A deferred renderer draws nothing and only collects the percent changes (see
+    take_pending), for the analysis worker processes to hand to the parent's renderer.
+
+    Parameters:
+        base_dir (str): output directory
+        workers (int): rendering processes, 0 to draw inside submit() (blocking)
+        summary_only (bool): skip the per-city graphs and write the summary instead
+        deferred (bool): only collect the percent changes
+
+    """
+
+    def __init__(self, base_dir, workers=1, summary_only=False, deferred=False):
+        self.base_dir = base_dir
+        self.summary_only = summary_only
+        self.deferred = deferred
+        self.changes = []
+        self.futures = []
+        self.pool = None
+        if workers > 0 and not summary_only and not deferred:
+            # spawned, not forked, so they don't inherit buffered log output or the graph arrays
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, city_name, original_stats, updated_stats):
+        """
+        Queues the percent change graph of one city.
+
+        Returns:
+            the PNG filename it will be saved as, None in summary only mode
+
+        """
+        return self.queue(city_name, percent_changes(original_stats, updated_stats))
+
+    def queue(self, city_name, changes):
+        """
+        Queues the graph of percent changes already computed (e.g. by a deferred renderer).
+        """
+        self.changes.append((city_name, changes))
+        if self.summary_only:
+            return None
+
+        filename = percent_change_filename(self.base_dir, city_name)
+        if self.pool is not None:
+            self.futures.append(self.pool.submit(render_percent_change, city_name, changes, filename))
+        elif not self.deferred:
+            render_percent_change(city_name, changes, filename)
+        return filename
+
+    def take_pending(self):
+        """
+        Returns and forgets the (city_name, changes) collected so far.
+        """
+        pending, self.changes = self.changes, []
+        return pending
+
+    def close(self):
+        """
+        Waits for the queued graphs (raising the first rendering error) and writes the
+        summary in summary only mode.
+
+        Returns:
+            list of the summary files written
+
+        """
+        try:
+            for future in self.futures:
+                future.result()
+        finally:
+            self.futures = []
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+        if not self.summary_only or self.deferred or not self.changes:
+            return []
+        return write_summary(self.changes, self.base_dir)
+
+
+def percent_changes(original_stats, updated_stats):
+    """
+    Percent change of every plotted stat in both original_stats and updated_stats.
+    """
+    return {
+        key: ((updated_stats[key] - original_stats[key]) / original_stats[key]) * 100
+        for key in original_stats.keys()
+        if key not in EXCLUDED_STATS and key in updated_stats
+    }
+
+
+def percent_change_filename(base_dir, city_name):
+    return os.path.join(base_dir, f"{city_name.replace(' ', '_')}_percent_change.png")
+
+
+@timed("png writing")
+def render_percent_change(city_name, changes, filename):
+    """
+    Draws the bar graph of one city's percent changes and saves it as filename.
+    """
+    labels = list(changes.keys())
+    values = list(changes.values())
+
+    x = np.arange(len(labels))
+
+    fig = agg_figure(figsize=(15, 9))
+    ax = fig.add_subplot()
+    ax.bar(x, values, color="skyblue", alpha=0.8)
+    ax.set_ylabel("Percent Change (%)")
+    ax.set_title(f"Percent Change in Network Stats for {city_name}")
+    ax.set_xticks(x, labels, rotation=45, ha="right")
+    ax.axhline(0, color="black", linewidth=0.8, linestyle="--")
+
+    # Add labels
+    for i, v in enumerate(values):
+        ax.text(
+            i, v + (0.1 if v > 0 else -0.1),
+            f"{v:.3f}%",
+            ha="center",
+            va="bottom" if v > 0 else "top",
+            fontsize=9
+        )
+
+    fig.tight_layout()
+    fig.savefig(filename)
+
+
+def write_summary(changes, base_dir):
+    """
+    Writes the percent changes of all cities as one figure with a panel per stat,
+    a CSV with a row per city and a JSON object keyed by city.
+
+    Parameters:
+        changes (list): (city_name, {stat: percent change}) pairs, in analysis order
+        base_dir (str): output directory
+
+    Returns:
+        list of the files written
+
+    """
+    stats = list(dict.fromkeys(key for _, city_changes in changes for key in city_changes))
+    names = [name for name, _ in changes]
+
+    csv_file = os.path.join(base_dir, "percent_changes.csv")
+    with open(csv_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["city"] + stats)
+        for name, city_changes in changes:
+            writer.writerow([name] + [city_changes.get(key) for key in stats])
+
+    json_file = os.path.join(base_dir, "percent_changes.json")
+    with open(json_file, "w") as f:
+        json.dump({name: city_changes for name, city_changes in changes}, f, indent=2)
+
+    y = np.arange(len(names))
+    fig = agg_figure(figsize=(6 * len(stats), max(4, 0.3 * len(names) + 2)))
+    axes = fig.subplots(1, len(stats), sharey=True, squeeze=False)[0]
+    for ax, key in zip(axes, stats):
+        values = [city_changes.get(key, np.nan) for _, city_changes in changes]
+        ax.barh(y, values, color="skyblue", alpha=0.8)
+        ax.axvline(0, color="black", linewidth=0.8, linestyle="--")
+        ax.set_title(key)
+        ax.set_xlabel("Percent Change (%)")
+    axes[0].set_yticks(y, names)
+    axes[0].invert_yaxis()
+    fig.suptitle("Percent Change in Network Stats per Candidate City")
+    fig.tight_layout()
+
+    figure_file = os.path.join(base_dir, "percent_change_summary.png")
+    fig.savefig(figure_file)
+
+    return [figure_file, csv_file, json_file]
+
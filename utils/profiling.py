@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import functools
+import contextlib
+import tracemalloc
+
+
+class Timings:
+    """
+    Nested timing spans of a run, aggregated by call path.
+
+    Every span records its count and wall time under the path of the spans it runs
+    in (e.g. main;candidates;process_city;candidate stats), and, while tracemalloc
+    is tracing, the net memory it allocated. The overhead is two perf_counter calls
+    per span, so the spans stay on in normal runs.
+
+    """
+
+    def __init__(self):
+        self.records = {}
+        self._stack = []
+
+    @contextlib.contextmanager
+    def span(self, name):
+        self._stack.append(name)
+        path = tuple(self._stack)
+        memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = self.records.setdefault(path, [0, 0.0, 0])
+            record[0] += 1
+            record[1] += time.perf_counter() - start
+            if memory is not None:
+                record[2] += tracemalloc.get_traced_memory()[0] - memory
+            self._stack.pop()
+
+    def timed(self, name=None):
+        """
+        Decorator running the function in a span (named after the function by default).
+        """
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name or fn.__name__):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def take(self):
+        """
+        Returns and clears the records, e.g. for a worker process to send to the parent.
+        """
+        records, self.records = self.records, {}
+        return records
+
+    def reset(self):
+        """
+        Drops the records and open spans, e.g. those a forked worker process inherited.
+        """
+        self.records = {}
+        self._stack = []
+
+    def merge(self, records):
+        """
+        Adds records taken in another process under the current span.
+        """
+        prefix = tuple(self._stack)
+        for path, (count, seconds, memory) in records.items():
+            record = self.records.setdefault(prefix + path, [0, 0.0, 0])
+            record[0] += count
+            record[1] += seconds
+            record[2] += memory
+
+    def summary(self):
+        """
+        Returns the breakdown as a JSON-serializable dict: every call path with its count,
+        total and self time (total minus its child spans) and memory, plus totals per span name.
+        """
+        child_seconds = {}
+        for path, (_, seconds, _) in self.records.items():
+            if len(path) > 1:
+                child_seconds[path[:-1]] = child_seconds.get(path[:-1], 0.0) + seconds
+
+        spans, phases = [], {}
+        for path, (count, seconds, memory) in sorted(self.records.items()):
+            spans.append({
+                'path': ';'.join(path), 'count': count, 'total_s': seconds,
+                'self_s': max(seconds - child_seconds.get(path, 0.0), 0.0), 'memory_bytes': memory,
+            })
+            # a name nested in itself is only counted at its outermost span
+            if path[-1] not in path[:-1]:
+                phase = phases.setdefault(path[-1], {'count': 0, 'total_s': 0.0})
+                phase['count'] += count
+                phase['total_s'] += seconds
+
+        phases = dict(sorted(phases.items(), key=lambda item: -item[1]['total_s']))
+        return {'spans': spans, 'phases': phases}
+
+    def write(self, base_dir, name='timings'):
+        """
+        Writes <name>.json (see summary) and <name>.collapsed, the self times in
+        microseconds as collapsed stacks for flamegraph.pl or speedscope.
+
+        Returns:
+            list of the files written
+
+        """
+        summary = self.summary()
+        json_file = os.path.join(base_dir, f'{name}.json')
+        with open(json_file, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        collapsed_file = os.path.join(base_dir, f'{name}.collapsed')
+        with open(collapsed_file, 'w') as f:
+            for span in summary['spans']:
+                microseconds = int(round(span['self_s'] * 1e6))
+                if microseconds > 0:
+                    f.write(f"{span['path']} {microseconds}\n")
+
+        return [json_file, collapsed_file]
+
+
+# Spans of this process
+timings = Timings()
+span = timings.span
+timed = timings.timed
+
+
+def run_profiled(fn, base_dir, cprofile=False, trace_memory=False, top=30):
+    """
+    Runs fn() in a 'run' span and writes the timing breakdown to base_dir, with
+    cprofile also profile.pstats and the top functions by cumulative time in
+    profile.txt, and with trace_memory the per-span allocations (in the JSON) and
+    the top allocation sites in memory.txt.
+
+    Returns:
+        (result of fn, timing files written, cProfile and tracemalloc files written)
+
+    """
+    profiler = cProfile.Profile() if cprofile else None
+    if trace_memory:
+        tracemalloc.start()
+
+    timing_files, profile_files, snapshot = [], [], None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            with span('run'):
+                result = fn()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if trace_memory:
+                # taken before the reports below allocate anything
+                current, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+    finally:
+        timing_files = timings.write(base_dir)
+
+        if profiler is not None:
+            stats_file = os.path.join(base_dir, 'profile.pstats')
+            profiler.dump_stats(stats_file)
+            text_file = os.path.join(base_dir, 'profile.txt')
+            with open(text_file, 'w') as f:
+                pstats.Stats(stats_file, stream=f).sort_stats('cumulative').print_stats(top)
+            profile_files += [stats_file, text_file]
+
+        if snapshot is not None:
+            memory_file = os.path.join(base_dir, 'memory.txt')
+            with open(memory_file, 'w') as f:
+                f.write(f"current: {current / 2**20:.1f} MiB, peak: {peak / 2**20:.1f} MiB\n\n")
+                for stat in snapshot.statistics('lineno')[:top]:
+                    f.write(f"{stat}\n")
+            profile_files.append(memory_file)
+
+    return result, timing_files, profile_files
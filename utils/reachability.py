@@ -0,0 +1,117 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from utils.csr_graph import CSRGraph, _csr_from_coo, _ranges
+
+# Rows of component bitsets expanded to one byte per bit at a time when counting
+BLOCK_ROWS = 4096
+
+
+class ReachabilityIndex:
+    """
+    Reachable pair counts of a directed graph from its strongly connected components.
+
+    Every node of a component reaches the same nodes, so the graph is condensed into
+    a DAG of components and the components reachable from each one are propagated
+    as bitsets (rows of uint64 words, bit c for component c) from the sinks up, one
+    topological level at a time. Pair counts are then the component sizes summed
+    over the set bits instead of a BFS from every node.
+
+    An airport added with flights to and from existing airports T reaches whatever T
+    reaches and is reached by whatever reaches T, so it only merges the components
+    in between into one; candidate_pairs counts the result from the bitsets without
+    rebuilding anything.
+
+    Parameters:
+        G (CSRGraph): flight network
+
+    """
+
+    def __init__(self, G):
+        n = len(G)
+        A = sparse.csr_matrix((np.ones(len(G.indices), dtype=np.int8), G.indices, G.indptr), shape=(n, n))
+        k, labels = csgraph.connected_components(A, directed=True, connection='strong')
+        self.labels = labels.astype(np.int64)
+        self.sizes = np.bincount(self.labels, minlength=k).astype(np.int64)
+
+        # condensation DAG, an edge per pair of components with a flight between them
+        src, dst = G.edges()
+        src, dst = self.labels[src], self.labels[dst]
+        keep = src != dst
+        self.dag = CSRGraph(np.arange(k), *_csr_from_coo(src[keep], dst[keep], k))
+
+        words = (k + 63) // 64
+        self.reach = np.zeros((k, words), dtype=np.uint64)
+        components = np.arange(k)
+        self.reach[components, components >> 6] = _bits(components)
+        self._propagate()
+
+        self.reach_sizes = _weighted_counts(self.reach, self.sizes)
+        self.num_reachable_pairs = int(self.sizes @ self.reach_sizes)
+
+    @property
+    def num_components(self):
+        return len(self.sizes)
+
+    def _propagate(self):
+        # Kahn's order from the sinks: a level is OR-ed together once all its successors are done
+        dag, predecessors = self.dag, self.dag.reverse()
+        remaining = dag.out_degree().copy()
+        frontier = np.flatnonzero(remaining == 0)
+        while len(frontier):
+            starts, stops = dag.indptr[frontier], dag.indptr[frontier + 1]
+            inner = frontier[stops > starts]
+            if len(inner):
+                starts, stops = dag.indptr[inner], dag.indptr[inner + 1]
+                offsets = np.concatenate([[0], np.cumsum(stops - starts)[:-1]])
+                successors = dag.indices[_ranges(starts, stops)]
+                self.reach[inner] |= np.bitwise_or.reduceat(self.reach[successors], offsets, axis=0)
+
+            parents = predecessors.indices[_ranges(predecessors.indptr[frontier], predecessors.indptr[frontier + 1])]
+            remaining -= np.bincount(parents, minlength=len(remaining))
+            frontier = np.unique(parents[remaining[parents] == 0])
+
+    def reachable_pairs(self):
+        """
+        Number of (source, target) pairs with a path, each node counted as reaching itself.
+        """
+        return self.num_reachable_pairs
+
+    def candidate_pairs(self, targets, num_new=0):
+        """
+        Reachable pairs after adding one airport with flights to and from the node
+        indices targets and to and from num_new airports that are not in the graph yet.
+        """
+        pairs = self.num_reachable_pairs
+        num_into = num_out = 0
+        components = np.unique(self.labels[np.asarray(targets, dtype=np.int64)])
+        if len(components):
+            # components reached from the targets, and the ones reaching them
+            descendants = np.bitwise_or.reduce(self.reach[components], axis=0)
+            target_bits = np.zeros_like(descendants)
+            np.bitwise_or.at(target_bits, components >> 6, _bits(components))
+            ancestors = np.flatnonzero((self.reach & target_bits).any(axis=1))
+
+            # the ancestors now also reach the descendants through the new airport
+            gained = _weighted_counts(descendants[None, :] & ~self.reach[ancestors], self.sizes)
+            pairs += int(self.sizes[ancestors] @ gained)
+            num_into = int(self.sizes[ancestors].sum())
+            num_out = int(_weighted_counts(descendants[None, :], self.sizes)[0])
+
+        # the new airports reach each other and the descendants, and the ancestors reach them
+        return pairs + (1 + num_new) * (1 + num_new + num_into + num_out)
+
+
+def _bits(components):
+    return np.left_shift(np.uint64(1), (components & 63).astype(np.uint64))
+
+
+def _weighted_counts(bitsets, weights):
+    # per bitset row, the weights summed over its set bits
+    counts = np.zeros(len(bitsets), dtype=np.int64)
+    for start in range(0, len(bitsets), BLOCK_ROWS):
+        block = bitsets[start:start + BLOCK_ROWS].astype('<u8')
+        bits = np.unpackbits(block.view(np.uint8), axis=1, bitorder='little')[:, :len(weights)]
+        counts[start:start + BLOCK_ROWS] = bits @ weights
+    return counts
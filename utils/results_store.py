@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import datetime
+import platform
+
+import numpy as np
+import pandas as pd
+
+from utils.dataset_loader import file_hash
+from utils.network_stats import BETWEENNESS_CI, WEIGHTED_DEGREE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only the JSON Lines format is available without pyarrow
+    pq = None
+
+MANIFEST_NAME = 'manifest.json'
+
+# Stats dict keys and the result columns they are stored in
+STAT_COLUMNS = {
+    'Connectivity/Reachability': 'connectivity',
+    'Average Betweenness Centrality': 'avg_betweenness',
+    'Global Clustering Coefficient': 'clustering',
+    WEIGHTED_DEGREE: 'avg_weighted_degree',
+}
+
+# Columns of a candidate record, in order
+RESULT_COLUMNS = [
+    'line', 'city', 'airport_id', 'airport_name', 'latitude', 'longitude', 'flights',
+    'connectivity', 'avg_betweenness', 'clustering', 'avg_weighted_degree', 'betweenness_ci',
+    'connectivity_change', 'avg_betweenness_change', 'clustering_change', 'avg_weighted_degree_change', 'error',
+]
+
+
+class ResultsWriter:
+    """
+    Appends one record per candidate city to a JSON Lines (.jsonl) or Parquet
+    (.parquet) file, buffered and written batch_size records at a time.
+
+    Every record has the RESULT_COLUMNS: the candidate row, the AIRPORT_IDs of the
+    proposed flights, the updated stats and their percent changes from the original
+    network, and the error message of a candidate that failed (its stats are null).
+    JSON Lines batches are appended to one file. Parquet batches are each written as
+    a finished part file (results.part-00000.parquet, ...), since a Parquet file is
+    only readable once its footer is written, so the batches of an interrupted run
+    can still be read. on_flush(files) is called after every batch with the files
+    written so far, e.g. to list them in the manifest.
+
+    Parameters:
+        path (str): results file, the format follows the extension
+        batch_size (int): records buffered before they are written
+        on_flush (callable, optional): called with the list of result files after each batch
+
+    """
+
+    def __init__(self, path, batch_size=50, on_flush=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.format = 'parquet' if path.endswith('.parquet') else 'jsonl'
+        self.count = 0
+        self.files = []
+        self._buffer = []
+
+        if self.format == 'parquet' and pq is None:
+            raise ImportError("writing Parquet results requires pyarrow")
+
+    def append(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered records.
+        """
+        if not self._buffer:
+            return
+
+        if self.format == 'parquet':
+            table = pa.Table.from_pylist(self._buffer, schema=RESULT_SCHEMA)
+            part_path = f'{self.path[:-len(".parquet")]}.part-{len(self.files):05d}.parquet'
+            tmp_path = f'{part_path}.{os.getpid()}.tmp'
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, part_path)
+            self.files.append(part_path)
+        else:
+            with open(self.path, 'a') as f:
+                for record in self._buffer:
+                    f.write(json.dumps(record) + '\n')
+            if not self.files:
+                self.files.append(self.path)
+        self._buffer = []
+
+        if self.on_flush is not None:
+            self.on_flush(self.files)
+
+    def close(self):
+        self.flush()
+
+
+def candidate_record(line, city_data, top_flights, original_stats, updated_stats=None, error=None):
+    """
+    Builds the result record of one candidate city.
+
+    Parameters:
+        line (int): row of candidate_cities.csv
+        city_data (pd.Series): the candidate row
+        top_flights (list): proposed flights as returned by get_best_flights_for_city
+        original_stats, updated_stats (dict): stats of the original and updated network
+        error (str, optional): why the candidate failed
+
+    Returns:
+        dict with the RESULT_COLUMNS
+
+    """
+    record = {
+        'line': int(line),
+        'city': _value(city_data.get('DISPLAY_AIRPORT_CITY_NAME_FULL')),
+        'airport_id': _value(city_data.get('AIRPORT_ID')),
+        'airport_name': _value(city_data.get('DISPLAY_AIRPORT_NAME')),
+        'latitude': _value(city_data.get('LATITUDE')),
+        'longitude': _value(city_data.get('LONGITUDE')),
+        'flights': [int(airport['AIRPORT_ID']) for airport in top_flights],
+    }
+    if record['airport_id'] is not None:
+        record['airport_id'] = int(record['airport_id'])
+
+    stats = updated_stats or {}
+    for key, column in STAT_COLUMNS.items():
+        record[column] = float(stats[key]) if key in stats else None
+    record['betweenness_ci'] = float(stats[BETWEENNESS_CI]) if BETWEENNESS_CI in stats else None
+    for key, column in STAT_COLUMNS.items():
+        record[column + '_change'] = (
+            (stats[key] - original_stats[key]) / original_stats[key] * 100
+            if key in stats and original_stats.get(key) else None
+        )
+    record['error'] = error
+    return record
+
+
+def write_manifest(base_dir, inputs, parameters, **fields):
+    """
+    Writes (or rewrites) the manifest.json of a run: the size and SHA-256 of every
+    input file, the run parameters and any extra fields (e.g. the original stats).
+
+    Parameters:
+        base_dir (str): run output directory
+        inputs (dict): name -> path of the input files
+        parameters (dict): run parameters
+        fields: additional JSON-serializable entries
+
+    Returns:
+        the manifest dict
+
+    """
+    manifest = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'argv': sys.argv,
+        'parameters': parameters,
+        'inputs': {
+            name: {'path': path, 'size': os.path.getsize(path), 'sha256': file_hash(path)}
+            for name, path in inputs.items()
+        },
+    }
+    return update_manifest(base_dir, manifest, **fields)
+
+
+def update_manifest(base_dir, manifest, **fields):
+    """
+    Rewrites the manifest.json of a run with some fields changed (e.g. the results
+    written so far), without hashing the inputs again.
+
+    Returns:
+        the updated manifest dict
+
+    """
+    manifest = {**manifest, **fields}
+
+    path = os.path.join(base_dir, MANIFEST_NAME)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, default=_value)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_results(base_dir, columns=None):
+    """
+    Loads the candidate records of a run as a DataFrame, from the result files its
+    manifest.json lists. For an interrupted run these are the batches written before
+    it stopped.
+    """
+    with open(os.path.join(base_dir, MANIFEST_NAME)) as f:
+        files = [os.path.join(base_dir, name) for name in json.load(f).get('results', [])]
+
+    frames = []
+    for path in files:
+        if path.endswith('.parquet'):
+            frames.append(pd.read_parquet(path))
+        else:
+            frames.append(pd.read_json(path, lines=True, dtype=False, precise_float=True))
+    if not frames:
+        return pd.DataFrame(columns=columns or RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True).reindex(columns=columns or RESULT_COLUMNS)
+
+
+def _value(value):
+    # numpy scalars and NaN to plain JSON values
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        return None if isinstance(value, float) and np.isnan(value) else value
+    return value
+
+
+if pq is not None:
+    RESULT_SCHEMA = pa.schema([
+        ('line', pa.int64()),
+        ('city', pa.string()),
+        ('airport_id', pa.int64()),
+        ('airport_name', pa.string()),
+        ('latitude', pa.float64()),
+        ('longitude', pa.float64()),
+        ('flights', pa.list_(pa.int64())),
+        ('connectivity', pa.float64()),
+        ('avg_betweenness', pa.float64()),
+        ('clustering', pa.float64()),
+        ('avg_weighted_degree', pa.float64()),
+        ('betweenness_ci', pa.float64()),
+        ('connectivity_change', pa.float64()),
+        ('avg_betweenness_change', pa.float64()),
+        ('clustering_change', pa.float64()),
+        ('avg_weighted_degree_change', pa.float64()),
+        ('error', pa.string()),
+    ])
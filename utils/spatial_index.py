@@ -0,0 +1,131 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from utils.geo_distance import EARTH_RADIUS_KM, paired_distance, _convert
+
+# Upper bound on the relative difference between WGS-84 geodesic and haversine
+# distances (about 0.56%), used to pad sphere queries before the exact refinement
+ELLIPSOID_MARGIN = 0.01
+
+
+class AirportIndex:
+    """
+    k-d tree over airport coordinates mapped onto the unit sphere, for nearest-airport
+    and within-radius queries in O(log n) instead of scanning every airport.
+
+    Queries run on chord distances on the sphere and, with method='ellipsoidal', the
+    candidates are padded by ELLIPSOID_MARGIN and re-measured with the WGS-84 geodesic,
+    so the results match the exact distance filters they replace.
+
+    Parameters:
+        airports_df (pd.DataFrame): airport table with latitude/longitude columns
+        lat_col, lon_col (str): coordinate column names
+
+    Positions returned by the queries are row positions in airports_df (for .iloc).
+
+    """
+
+    def __init__(self, airports_df, lat_col='LATITUDE', lon_col='LONGITUDE'):
+        lats = airports_df[lat_col].to_numpy(dtype=np.float64)
+        lons = airports_df[lon_col].to_numpy(dtype=np.float64)
+
+        # Airports with missing coordinates are never returned
+        valid = ~(np.isnan(lats) | np.isnan(lons))
+        self.positions = np.flatnonzero(valid)
+        self.lats = lats[valid]
+        self.lons = lons[valid]
+        self.tree = cKDTree(_unit_vectors(self.lats, self.lons))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def query_radius(self, lat, lon, radius, unit='km', method='ellipsoidal'):
+        """
+        Finds the airports within radius of a point.
+
+        Parameters:
+            lat, lon (float): query point in degrees
+            radius (float): search radius in unit
+            unit (str): 'km' or 'miles'
+            method (str): distance used for the cut-off, 'ellipsoidal' or 'haversine'
+
+        Returns:
+            (positions, distances): sorted airports_df row positions and their distances in unit
+
+        """
+        # The padded sphere search is a superset, the exact distances do the cut-off
+        search_km = radius / _convert(1.0, unit) * (1 + ELLIPSOID_MARGIN)
+        found = np.sort(np.asarray(
+            self.tree.query_ball_point(_unit_vectors(lat, lon), _chord(search_km)), dtype=np.int64
+        ))
+
+        distances = paired_distance(lat, lon, self.lats[found], self.lons[found], method=method, unit=unit)
+        keep = distances <= radius
+        return self.positions[found[keep]], distances[keep]
+
+    def query_nearest(self, lats, lons, k=1, unit='km', method='ellipsoidal'):
+        """
+        Finds the k nearest airports of every query point.
+
+        Parameters:
+            lats, lons (array-like): query points in degrees, NaN points get no neighbors
+            k (int): number of neighbors
+            unit (str): 'km' or 'miles'
+            method (str): distance used to rank the neighbors, 'ellipsoidal' or 'haversine'
+
+        Returns:
+            (distances, positions): arrays of shape (len(lats), k), sorted nearest first,
+            padded with inf and -1 where there are fewer than k airports
+
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        distances = np.full((len(lats), k), np.inf)
+        positions = np.full((len(lats), k), -1, dtype=np.int64)
+
+        valid = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        k_tree = min(k, len(self))
+        if not len(valid) or not k_tree:
+            return distances, positions
+
+        points = _unit_vectors(lats[valid], lons[valid])
+        chords, found = self.tree.query(points, k=k_tree)
+        chords, found = chords.reshape(len(valid), k_tree), found.reshape(len(valid), k_tree)
+
+        if method == 'ellipsoidal':
+            # Any airport that beats the k-th sphere neighbor on the ellipsoid lies
+            # within the padded sphere radius, so re-rank all of those
+            search_km = _arc_km(chords[:, -1]) * (1 + ELLIPSOID_MARGIN) / (1 - ELLIPSOID_MARGIN)
+            candidates = self.tree.query_ball_point(points, _chord(search_km))
+            counts = np.array([len(c) for c in candidates])
+            query = np.repeat(np.arange(len(valid)), counts)
+            found_all = np.concatenate([np.asarray(c, dtype=np.int64) for c in candidates])
+            d = paired_distance(
+                lats[valid][query], lons[valid][query], self.lats[found_all], self.lons[found_all],
+                method=method, unit=unit
+            )
+            order = np.lexsort((d, query))
+            rank = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+            take = order[rank < k_tree]
+            rows, cols = query[take], rank[rank < k_tree]
+            distances[valid[rows], cols] = d[take]
+            positions[valid[rows], cols] = self.positions[found_all[take]]
+        else:
+            distances[valid, :k_tree] = _convert(_arc_km(chords), unit)
+            positions[valid, :k_tree] = self.positions[found]
+
+        return distances, positions
+
+
+def _unit_vectors(lats, lons):
+    lats, lons = np.radians(lats), np.radians(lons)
+    return np.stack([np.cos(lats) * np.cos(lons), np.cos(lats) * np.sin(lons), np.sin(lats)], axis=-1)
+
+
+def _chord(distance_km):
+    # chord length on the unit sphere for a great-circle distance
+    return 2 * np.sin(np.minimum(distance_km / EARTH_RADIUS_KM, np.pi) / 2)
+
+
+def _arc_km(chord):
+    return 2 * np.arcsin(np.minimum(chord / 2, 1.0)) * EARTH_RADIUS_KM
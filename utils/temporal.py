@@ -0,0 +1,126 @@
+import numpy as np
+
+from utils.csr_graph import CSRGraph
+from utils.checkpoints import CheckpointStore, checkpoint_key
+from utils.network_stats import IncrementalNetworkStats
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+class MonthlySnapshots:
+    """
+    Flight network snapshots per month, or per rolling window of months, built from
+    the MONTH_MASK of a route table (see flight_aggregator.aggregate_routes).
+
+    A route belongs to a snapshot when it was flown in any month of the window. All
+    snapshots share the node indices of every airport in the route table, and each one
+    is derived from the previous snapshot by removing the routes that stopped and adding
+    the routes that started (CSRGraph.apply_edge_changes), not rebuilt from flights.csv.
+
+    Parameters:
+        routes (pd.DataFrame): route table with ORIGIN_AIRPORT_ID, DEST_AIRPORT_ID, MONTH_MASK
+        window (int): months per snapshot, rolling by one month, at most the months with flights
+
+    """
+
+    def __init__(self, routes, window=1):
+        origins = routes['ORIGIN_AIRPORT_ID'].to_numpy(dtype=np.int64)
+        dests = routes['DEST_AIRPORT_ID'].to_numpy(dtype=np.int64)
+        self.node_ids = np.unique(np.concatenate([origins, dests]))
+        self.src = np.searchsorted(self.node_ids, origins)
+        self.dst = np.searchsorted(self.node_ids, dests)
+        self.masks = routes['MONTH_MASK'].to_numpy(dtype=np.int64)
+
+        combined = int(np.bitwise_or.reduce(self.masks)) if len(self.masks) else 0
+        months = [m for m in range(1, 13) if combined >> (m - 1) & 1]
+        if not 1 <= window <= len(months):
+            raise ValueError(f"window has to be between 1 and the {len(months)} months with flights, not {window}")
+        self.windows = [months[i:i + window] for i in range(len(months) - window + 1)]
+
+    def __len__(self):
+        return len(self.windows)
+
+    def __iter__(self):
+        """
+        Yields (label, graph) per window, graph over every airport of the route table.
+        """
+        graph = CSRGraph(self.node_ids, np.zeros(len(self.node_ids) + 1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+        active = np.zeros(len(self.masks), dtype=bool)
+        for months in self.windows:
+            window_mask = sum(1 << (m - 1) for m in months)
+            now_active = (self.masks & window_mask) != 0
+            added = now_active & ~active
+            removed = active & ~now_active
+            graph = graph.apply_edge_changes(self.src[added], self.dst[added], self.src[removed], self.dst[removed])
+            active = now_active
+            yield window_label(months), graph
+
+
+def window_label(months):
+    if len(months) == 1:
+        return MONTH_NAMES[months[0] - 1]
+    return f"{MONTH_NAMES[months[0] - 1]}-{MONTH_NAMES[months[-1] - 1]}"
+
+
+def active_subgraph(graph):
+    """
+    The snapshot restricted to the airports with at least one route in it.
+    """
+    return graph.subgraph(np.flatnonzero(graph.degree() > 0))
+
+
+class SnapshotEvaluator:
+    """
+    Network stats of time-slice snapshots and of candidate airports added to them,
+    cached by snapshot content: a snapshot whose route set did not change (e.g. the
+    same routes flown in two months) reuses the stats and the baseline state of the
+    earlier one, and with a checkpoint store the results carry over between runs.
+
+    Stats are computed on the airports active in the snapshot (active_subgraph).
+
+    Parameters:
+        checkpoints (CheckpointStore, optional): persistent cache, in memory if None
+        pivots (iterable, optional): AIRPORT_IDs to sample betweenness from
+
+    """
+
+    def __init__(self, checkpoints=None, pivots=None):
+        self.checkpoints = checkpoints if checkpoints is not None else CheckpointStore(None)
+        self.pivots = None if pivots is None else sorted(int(p) for p in pivots)
+        self._evaluators = {}
+
+    def stats(self, graph):
+        """
+        Returns the stats dict of a snapshot, with its number of nodes, edges and density.
+        """
+        active = active_subgraph(graph)
+        key = checkpoint_key("snapshot", active.fingerprint(), self.pivots)
+        if key not in self.checkpoints:
+            stats = dict(self._evaluator(active).baseline_stats()) if len(active) else {}
+            stats.update({
+                "Number of Nodes": len(active), "Number of Edges": active.number_of_edges(),
+                "Density": active.density(),
+            })
+            self.checkpoints.put(key, stats)
+        return self.checkpoints.get(key)
+
+    def candidate_stats(self, graph, candidate_airport, airport_ids):
+        """
+        Returns the stats dict of a snapshot with candidate_airport connected to airport_ids.
+        """
+        active = active_subgraph(graph)
+        targets = [int(a) for a in airport_ids]
+        key = checkpoint_key("snapshot candidate", active.fingerprint(), self.pivots, int(candidate_airport), targets)
+        if key not in self.checkpoints:
+            self.checkpoints.put(key, self._evaluator(active).candidate_stats(candidate_airport, targets))
+        return self.checkpoints.get(key)
+
+    def _evaluator(self, active):
+        # one baseline state per distinct snapshot, only the latest few are kept
+        fingerprint = active.fingerprint()
+        if fingerprint not in self._evaluators:
+            if len(self._evaluators) >= 2:
+                self._evaluators.pop(next(iter(self._evaluators)))
+            pivots = None if self.pivots is None else [p for p in self.pivots if p in active]
+            self._evaluators[fingerprint] = IncrementalNetworkStats(active, pivots=pivots)
+        return self._evaluators[fingerprint]
@@ -1,52 +1,38 @@
-import pandas as pd
-import numpy as np
-import geopandas as gp
-from sklearn.preprocessing import MinMaxScaler, StandardScaler
-import matplotlib.pyplot as plt
-from shapely.geometry import Point
-
-# load map of USA from shape file
-SHAPEFILE_PATH = './shapefiles/tl_2024_us_state.shp'
-usa_map = gp.read_file(SHAPEFILE_PATH)
-
-# only include main 50 states
-not_main_50 = ['VI','MP','GU','AS','PR']
-for n in not_main_50:
-    usa_map = usa_map[usa_map.STUSPS != n]
-
-# cut off Alaska's western islands
-cities_df = pd.read_csv('../dataset/uscities.csv')
-east_cutoff = -48.378977
-west_cutoff = -178.281323
-cities_df = cities_df[cities_df['lng'] <= east_cutoff]
-cities_df = cities_df[cities_df['lng'] >= west_cutoff]
-
-# normalize and plot city population data
-data_points = [Point(xy) for xy in zip(cities_df['lat'], cities_df['lng'])]
-scaler = MinMaxScaler()
-population_norm = scaler.fit_transform(cities_df[['population']])
-population_norm = pd.Series(population_norm.flatten())
-usa_map.plot(color='white', edgecolor='black', figsize=(15,9))
-
-# create the heatmap
-latitudes = cities_df['lat'].tolist()
-longitudes = cities_df['lng'].tolist()
-heatmap, xedges, yedges = np.histogram2d(latitudes, longitudes, bins=150, weights=population_norm)
-plt.imshow(
-    heatmap,
-    cmap='rainbow',
-    extent=[yedges[0], yedges[-1], xedges[-1], xedges[0]],
-    zorder=2,
-    alpha=0.8,
-    interpolation='quadric',
-    vmax=0.5
-)
-
-# format output
-plt.gca().get_xaxis().set_visible(False)
-plt.gca().get_yaxis().set_visible(False)
-plt.title("Population Heatmap")
-plt.gca().patch.set_facecolor("black")
-plt.gca().invert_yaxis()
-plt.colorbar()
-plt.show()
+import os
+import argparse
+
+from utils.heatmap import PYRAMID_LEVELS, DEFAULT_BINS, load_basemap, heatmap_pyramid, render_heatmap
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SHAPEFILE_PATH = os.path.join(HERE, 'shapefiles', 'tl_2024_us_state.shp')
+CITIES_PATH = os.path.join(HERE, '..', 'dataset', 'uscities.csv')
+
+
+# Draws the US cities weighted by population at each of the bins resolutions
+# returns the files written (output/heatmaps/population_<bins>.png by default)
+def main(bins=(DEFAULT_BINS,), output_dir='output/heatmaps', basemap=True):
+    pyramid = heatmap_pyramid(CITIES_PATH, 'lat', 'lng', 'population')
+    usa_map = load_basemap(SHAPEFILE_PATH) if basemap else None
+
+    return [
+        render_heatmap(pyramid, b, "Population Heatmap", os.path.join(output_dir, f'population_{b}.png'), usa_map)
+        for b in bins
+    ]
+
+
+# Command line entry point (see cli.py)
+def cli(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Draw the city population heatmap")
+    parser.add_argument("--bins", type=int, nargs="+", choices=PYRAMID_LEVELS, default=[DEFAULT_BINS],
+                        help=f"grid resolutions to draw (default: {DEFAULT_BINS})")
+    parser.add_argument("--output-dir", default="output/heatmaps", help="directory of the PNG files")
+    parser.add_argument("--no-basemap", action="store_true",
+                        help="leave out the state outlines (no shapefile or geopandas needed)")
+    args = parser.parse_args(argv)
+
+    for filename in main(args.bins, args.output_dir, basemap=not args.no_basemap):
+        print(f"Heatmap saved as {filename}")
+
+
+if __name__ == "__main__":
+    cli()